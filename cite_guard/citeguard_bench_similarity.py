@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""Micro-benchmark: similarity calls on a resolve + ground sized workload.
+
+Simulates 500 references, each scored against 8 backend candidates per
+resolve pass (title jaccard + author overlap, query strings repeated as the
+cascade retries them), and 2000 claims each compared with the top 3
+snippets of the references they cite. Times the uncached implementation
+against the cached tokenize() layer.
+
+    python cite_guard/citeguard_bench_similarity.py [--refs 500] [--claims 2000] [--passes 3]
+"""
+from __future__ import annotations
+import argparse, random, re, sys, time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+import citeguard_similarity as sim
+
+# the pre-cache implementation, kept here as the baseline
+def _old_normalize(s):
+    s = (s or "").lower()
+    s = re.sub(r'[^a-z0-9\s]+', ' ', s)
+    s = re.sub(r'\s+', ' ', s).strip()
+    return s
+
+def _old_jaccard(a, b):
+    A = set(_old_normalize(a).split())
+    B = set(_old_normalize(b).split())
+    if not A or not B:
+        return 0.0
+    return len(A & B) / len(A | B)
+
+def _old_author_overlap(a, b):
+    def names(s):
+        out = set()
+        for p in re.split(r'\band\b|,|;', _old_normalize(s)):
+            toks = p.split()
+            if toks:
+                out.add(toks[-1])
+        return out
+    A, B = names(a), names(b)
+    if not A or not B:
+        return 0.0
+    return len(A & B) / len(A | B)
+
+def _workload(n_refs, n_claims, seed=7):
+    rnd = random.Random(seed)
+    vocab = [f"{w}{i}" for i, w in enumerate(["learning", "neural", "graph", "model", "attention", "policy", "robust", "data"] * 400)]
+    surnames = [f"Name{i}" for i in range(2000)]
+    def title():
+        return " ".join(rnd.choice(vocab) for _ in range(rnd.randint(6, 14))).title() + ": A Study"
+    def authors():
+        return " and ".join(f"{rnd.choice('ABCDEFGH')}. {rnd.choice(surnames)}" for _ in range(rnd.randint(1, 6)))
+    refs = [(title(), authors()) for _ in range(n_refs)]
+    cands = [[(title() if rnd.random() < 0.6 else t, authors() if rnd.random() < 0.5 else a) for _ in range(8)] for t, a in refs]
+    snippets = [[" ".join(rnd.choice(vocab) for _ in range(rnd.randint(30, 90))) + "." for _ in range(3)] for _ in refs]
+    claims = [(" ".join(rnd.choice(vocab) for _ in range(rnd.randint(12, 35))), rnd.sample(range(n_refs), rnd.randint(1, 3)))
+              for _ in range(n_claims)]
+    return refs, cands, snippets, claims
+
+def _run(jaccard, author_overlap, refs, cands, snippets, claims, passes):
+    total = 0.0
+    for _ in range(passes):
+        for (t, a), cs in zip(refs, cands):
+            for ct, ca in cs:
+                total += jaccard(t, ct) * 0.75 + author_overlap(a, ca) * 0.25
+            total += jaccard(t, cs[0][0])
+    for text, cited in claims:
+        for r in cited:
+            total += max(jaccard(text, sn) for sn in snippets[r])
+    return total
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--refs", type=int, default=500)
+    ap.add_argument("--claims", type=int, default=2000)
+    ap.add_argument("--passes", type=int, default=3, help="resolve passes (cascade retries / reruns)")
+    args = ap.parse_args(argv)
+    data = _workload(args.refs, args.claims)
+
+    t0 = time.perf_counter()
+    base = _run(_old_jaccard, _old_author_overlap, *data, args.passes)
+    t_old = time.perf_counter() - t0
+
+    sim.get_token_cache().clear()
+    t0 = time.perf_counter()
+    new = _run(sim.jaccard, sim.author_overlap, *data, args.passes)
+    t_new = time.perf_counter() - t0
+    cache = sim.get_token_cache()
+
+    print(f"workload: {args.refs} references x 8 candidates x {args.passes} passes, {args.claims} claims")
+    print(f"uncached: {t_old*1000:8.1f} ms")
+    print(f"cached:   {t_new*1000:8.1f} ms  ({t_old/max(t_new, 1e-9):.1f}x)")
+    print(f"cache: entries={len(cache.entries)} bytes={cache.bytes} hits={cache.hits} misses={cache.misses}")
+    if abs(base - new) > 1e-6:
+        print(f"MISMATCH: {base} != {new}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,87 @@
+from __future__ import annotations
+from typing import Any, Dict, List, Optional
+import threading, time
+
+# Per-backend circuit breakers for resolve. After `failure_threshold`
+# consecutive failures (unreachable host, 5xx, throttling that outlasted the
+# retries) a backend is opened for `cooldown_sec`: calls fail immediately with
+# BackendUnavailable instead of each waiting out http_timeout_sec. After the
+# cool-down one trial call is let through (half-open); success closes the
+# breaker, failure re-opens it.
+
+class BackendUnavailable(Exception):
+    def __init__(self, backend: str, reason: str = ""):
+        super().__init__(f"{backend} unavailable{': ' + reason if reason else ''}")
+        self.backend = backend
+        self.reason = reason
+
+class CircuitBreaker:
+    def __init__(self, backend: str, failure_threshold: int = 5, cooldown_sec: float = 120.0):
+        self.backend = backend
+        self.failure_threshold = max(1, failure_threshold)
+        self.cooldown_sec = cooldown_sec
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.trial_in_flight = False
+        self.times_opened = 0
+        self.short_circuited = 0
+        self.lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half_open" if time.monotonic() - self.opened_at >= self.cooldown_sec else "open"
+
+    def before_call(self) -> None:
+        """Raise BackendUnavailable while open; admit a single trial call once the cool-down is over."""
+        with self.lock:
+            if self.opened_at is None:
+                return
+            if time.monotonic() - self.opened_at >= self.cooldown_sec and not self.trial_in_flight:
+                self.trial_in_flight = True
+                return
+            self.short_circuited += 1
+        raise BackendUnavailable(self.backend, "circuit open")
+
+    def success(self) -> None:
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_in_flight = False
+
+    def failure(self) -> None:
+        with self.lock:
+            self.failures += 1
+            if self.trial_in_flight or (self.opened_at is None and self.failures >= self.failure_threshold):
+                self.opened_at = time.monotonic()
+                self.times_opened += 1
+            self.trial_in_flight = False
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_settings: Dict[str, float] = {"failure_threshold": 5, "cooldown_sec": 120.0}
+_lock = threading.Lock()
+
+def configure(cfg: Dict[str, Any]) -> None:
+    """Reset all breakers using the `circuit_breaker` config block."""
+    cb = cfg.get("circuit_breaker") or {}
+    with _lock:
+        _settings["failure_threshold"] = int(cb.get("failure_threshold", 5))
+        _settings["cooldown_sec"] = float(cb.get("cooldown_sec", 120))
+        _breakers.clear()
+
+def get_breaker(backend: str) -> CircuitBreaker:
+    with _lock:
+        b = _breakers.get(backend)
+        if b is None:
+            b = _breakers[backend] = CircuitBreaker(backend, int(_settings["failure_threshold"]), _settings["cooldown_sec"])
+        return b
+
+def report_lines() -> List[str]:
+    tripped = [b for b in _breakers.values() if b.times_opened or b.short_circuited]
+    if not tripped:
+        return []
+    lines = ["\n## Circuit breakers\n"]
+    for b in sorted(tripped, key=lambda x: x.backend):
+        lines.append(f"- {b.backend}: state={b.state} opened={b.times_opened} short_circuited_calls={b.short_circuited}\n")
+    return lines
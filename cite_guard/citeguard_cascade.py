@@ -0,0 +1,99 @@
+from __future__ import annotations
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Callable, Dict, List, Sequence
+import json, threading, time
+
+# Adaptive backend cascade for resolve. Fuzzy backends are tried one at a
+# time in the order that has worked best for this corpus (hit rate first,
+# then mean latency, persisted in out/backend_stats.json); the cascade stops
+# at the first backend whose candidates clear the pass thresholds. With
+# hedging on, a primary that has not answered within hedge_after_sec gets the
+# next backend started alongside it, and whichever passes first wins.
+
+class BackendStats:
+    def __init__(self, path: Path):
+        self.path = path
+        self.data: Dict[str, Dict[str, float]] = {}
+        self.lock = threading.Lock()
+        if path.exists():
+            try:
+                self.data = json.loads(path.read_text(encoding="utf-8"))
+            except Exception:
+                self.data = {}
+
+    def record(self, backend: str, latency_sec: float, hit: bool) -> None:
+        with self.lock:
+            st = self.data.setdefault(backend, {"calls": 0, "hits": 0, "latency_sec": 0.0})
+            st["calls"] += 1
+            st["hits"] += 1 if hit else 0
+            st["latency_sec"] += latency_sec
+
+    def hit_rate(self, backend: str) -> float:
+        st = self.data.get(backend) or {}
+        # Laplace-smoothed so unseen backends start at 0.5
+        return (st.get("hits", 0) + 1) / (st.get("calls", 0) + 2)
+
+    def mean_latency(self, backend: str) -> float:
+        st = self.data.get(backend) or {}
+        return st.get("latency_sec", 0.0) / st["calls"] if st.get("calls") else 0.0
+
+    def order(self, backends: Sequence[str]) -> List[str]:
+        # ties keep the configured order, so a fresh corpus behaves like the full search order
+        idx = {b: i for i, b in enumerate(backends)}
+        return sorted(backends, key=lambda b: (-round(self.hit_rate(b), 2), round(self.mean_latency(b), 1), idx[b]))
+
+    def save(self) -> None:
+        self.path.write_text(json.dumps(self.data, indent=2, sort_keys=True), encoding="utf-8")
+
+    def report_lines(self, backends: Sequence[str]) -> List[str]:
+        lines = ["\n## Backend cascade\n"]
+        for b in self.order(backends):
+            st = self.data.get(b) or {}
+            lines.append(f"- {b}: calls={int(st.get('calls', 0))} hit_rate={self.hit_rate(b):.2f} mean_latency={self.mean_latency(b):.2f}s\n")
+        return lines
+
+def run_cascade(order: Sequence[str], lookup: Callable[[str], list], passes: Callable[[list], bool],
+                stats: BackendStats, pool: ThreadPoolExecutor, hedge_after_sec: float = 0.0) -> Dict[str, list]:
+    """Query backends in `order` until one returns a passing candidate.
+
+    Returns {backend: candidates} for every backend that answered before the
+    cascade stopped. `pool` must not be the pool running this call, since the
+    caller blocks on the futures it submits.
+    """
+    results: Dict[str, list] = {}
+    pending: Dict[Future, str] = {}
+    started: Dict[str, float] = {}
+    nxt = 0
+
+    def start_next() -> None:
+        nonlocal nxt
+        b = order[nxt]
+        nxt += 1
+        started[b] = time.monotonic()
+        pending[pool.submit(lookup, b)] = b
+
+    while nxt < len(order) or pending:
+        if not pending:
+            start_next()
+        hedge = hedge_after_sec > 0 and nxt < len(order)
+        done, _ = wait(list(pending), timeout=hedge_after_sec if hedge else None, return_when=FIRST_COMPLETED)
+        if not done:
+            # primary is slow: hedge with the next backend
+            start_next()
+            continue
+        hit = False
+        for fut in sorted(done, key=lambda f: order.index(pending[f])):
+            b = pending.pop(fut)
+            try:
+                cands = fut.result()
+            except Exception:
+                cands = []
+            ok = passes(cands)
+            stats.record(b, time.monotonic() - started[b], ok)
+            results[b] = cands
+            hit = hit or ok
+        if hit:
+            # the losing hedge keeps running in the pool; its answer is not used
+            break
+    return results
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""End-to-end check of the offline metadata index on the bundled fixture dumps.
+
+Builds an index from fixtures/local_index/dblp.xml and works.jsonl with
+`index build`, runs init, audit and `--offline resolve` on the fixture paper
+in a temporary directory, and compares every reference's resolution with the
+Candidate the local backend is expected to return. Exits non-zero on any
+mismatch.
+
+    python cite_guard/citeguard_check_local_index.py
+"""
+from __future__ import annotations
+import json, os, subprocess, sys, tempfile
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+sys.path.insert(0, str(HERE))
+from citeguard_resolve_backends import Candidate
+
+FIXTURES = HERE / "fixtures" / "local_index"
+
+# work ids follow ingestion order: the DBLP records, then the OpenAlex works
+EXPECTED = {
+    "vaswani2017": Candidate("local", 1.0, {
+        "title": "Attention is All you Need",
+        "authors": "Ashish Vaswani and Noam Shazeer and Niki Parmar and Jakob Uszkoreit",
+        "year": 2017, "venue": "NIPS", "url": "https://dblp.org/rec/conf/nips/VaswaniSPUJGKP17",
+    }, {"local": "1", "arxiv": "1706.03762"}),
+    "lecun2015": Candidate("local", 1.0, {
+        "title": "Deep learning",
+        "authors": "Yann LeCun and Yoshua Bengio and Geoffrey E. Hinton",
+        "year": 2015, "venue": "Nat.", "url": "https://dblp.org/rec/journals/nature/LeCunBH15",
+    }, {"local": "2", "doi": "10.1038/nature14539"}),
+    "hochreiter1997": Candidate("local", 1.0, {
+        "title": "Long Short-Term Memory",
+        "authors": "Sepp Hochreiter and Jürgen Schmidhuber",
+        "year": 1997, "venue": "Neural Comput.", "url": "https://dblp.org/rec/journals/neco/HochreiterS97",
+    }, {"local": "3"}),
+    "bahdanau2015": Candidate("local", 1.0, {
+        "title": "Neural Machine Translation by Jointly Learning to Align and Translate",
+        "authors": "Dzmitry Bahdanau and Kyunghyun Cho and Yoshua Bengio",
+        "year": 2014, "venue": "arXiv", "url": "https://openalex.org/W2133564696",
+    }, {"local": "5", "arxiv": "1409.0473"}),
+    "he2016": Candidate("local", 1.0, {
+        "title": "Deep Residual Learning for Image Recognition",
+        "authors": "Kaiming He and Xiangyu Zhang and Shaoqing Ren and Jian Sun",
+        "year": 2016, "venue": "Computer Vision and Pattern Recognition", "url": "https://openalex.org/W2194775991",
+    }, {"local": "6", "doi": "10.1109/cvpr.2016.90"}),
+}
+
+def _run(argv, env) -> None:
+    r = subprocess.run([sys.executable, str(HERE / "cli.py")] + argv, env=env, capture_output=True, text=True)
+    if r.returncode:
+        raise SystemExit(f"{' '.join(argv[-2:])} failed ({r.returncode}):\n{r.stdout}{r.stderr}")
+
+def main() -> int:
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        cfg = tmp / "config.yaml"
+        cfg.write_text(f'local_index:\n  path: "{tmp / "index.sqlite"}"\nresponse_cache:\n  enabled: false\n', encoding="utf-8")
+        env = {**os.environ, "XDG_CACHE_HOME": str(tmp / "cache")}
+        common = ["--config", str(cfg), "--tex", str(FIXTURES / "main.tex"), "--bib", str(FIXTURES / "refs.bib"), "--out", str(tmp / "out")]
+        _run(common + ["index", "build", "--dblp-xml", str(FIXTURES / "dblp.xml"), "--openalex-jsonl", str(FIXTURES / "works.jsonl")], env)
+        for stage in (["init"], ["audit"], ["--offline", "resolve"]):
+            _run(common + stage, env)
+        records = json.loads((tmp / "out" / "resolution_cache.json").read_text(encoding="utf-8"))
+
+    failures = []
+    for key, want in EXPECTED.items():
+        rec = records.get(key) or {}
+        got = Candidate("local", float(rec.get("match_confidence") or 0.0), rec.get("canonical") or {}, rec.get("ids") or {})
+        if rec.get("status") != "resolved":
+            failures.append(f"{key}: status {rec.get('status')!r}, expected 'resolved'")
+        if (got.canonical, got.ids) != (want.canonical, want.ids):
+            failures.append(f"{key}: got {got}\n  expected {want}")
+    for line in failures:
+        print(f"FAIL {line}")
+    print(f"[check] {len(EXPECTED) - len({f.split(':')[0] for f in failures})}/{len(EXPECTED)} references resolved offline as expected")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
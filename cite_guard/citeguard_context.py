@@ -0,0 +1,147 @@
+from __future__ import annotations
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+import json, os
+
+from citeguard_csv import RowStore, write_rows_atomic
+from citeguard_working_store import SqliteRowStore
+from citeguard_yaml import load_yaml
+from citeguard_bib_parse import BibEntry, parse_bib_file
+from citeguard_tex_parse import parse_tex_project
+
+# State shared by the stages of one run. Config, bib entries, the TeX parse,
+# the audit_references.csv rows and resolution_cache.json are loaded at most
+# once and handed from stage to stage in memory; stage outputs are queued
+# and written by flush(). A stage run on its own gets a checkpointing
+# context, so it reads and writes exactly the files it always did; `all`
+# shares one context and writes once at the end (or after every stage with
+# --checkpoint). With working_store.backend: sqlite the rows live in a
+# SQLite store instead and the CSVs are written by `export`.
+
+class RunContext:
+    def __init__(self, tex_path: Path, bib_path: Path, out_dir: Path, args, checkpoint: bool = True):
+        self.tex_path = tex_path
+        self.bib_path = bib_path
+        self.out_dir = out_dir
+        self.args = args
+        self.checkpoint = checkpoint
+        self._cfg: Optional[Dict[str, Any]] = None
+        self._bib: Optional[List[BibEntry]] = None
+        self._tex: Optional[Tuple] = None
+        self._tex_error: Optional[Exception] = None
+        self._rows: Optional[RowStore] = None
+        self._res_cache: Optional[Dict[str, Any]] = None
+        self._res_cache_dirty = False
+        self._pending: Dict[str, Any] = {}
+
+    @property
+    def csv_path(self) -> Path:
+        return self.out_dir / "audit_references.csv"
+
+    @property
+    def res_cache_path(self) -> Path:
+        return self.out_dir / "resolution_cache.json"
+
+    @property
+    def store_backend(self) -> str:
+        """csv|sqlite: where the working rows live (--store overrides working_store.backend)."""
+        ws = self.config().get("working_store") or {}
+        return str(getattr(self.args, "store", None) or ws.get("backend") or "csv").lower()
+
+    @property
+    def store_path(self) -> Path:
+        ws = self.config().get("working_store") or {}
+        return Path(os.path.expanduser(str(ws["path"]))) if ws.get("path") else self.out_dir / "citeguard.sqlite"
+
+    @property
+    def table_path(self) -> Path:
+        return self.store_path if self.store_backend == "sqlite" else self.csv_path
+
+    def config(self) -> Dict[str, Any]:
+        if self._cfg is None:
+            self._cfg = {}
+            cfg_path = Path(self.args.config)
+            if cfg_path.exists():
+                try:
+                    self._cfg = load_yaml(cfg_path.read_text(encoding="utf-8"))
+                except Exception:
+                    self._cfg = {}
+        return self._cfg
+
+    def bib_list(self) -> List[BibEntry]:
+        """Entries in file order, duplicates included."""
+        if self._bib is None:
+            self._bib = parse_bib_file(self.bib_path)
+        return self._bib
+
+    def bib_entries(self) -> Dict[str, BibEntry]:
+        return {e.key: e for e in self.bib_list()}
+
+    def tex(self) -> Tuple:
+        """(citation_uses, usage_count, spans) of the TeX project; a parse failure is re-raised to every caller."""
+        if self._tex is None and self._tex_error is None:
+            try:
+                self._tex = parse_tex_project(self.tex_path)
+            except Exception as e:
+                self._tex_error = e
+        if self._tex_error is not None:
+            raise self._tex_error
+        return self._tex
+
+    def table(self) -> RowStore:
+        """The working rows: audit_references.csv (changes are written by flush())
+        or the SQLite store (each row update commits at once; a missing store is
+        imported from the CSV)."""
+        if self._rows is None:
+            if self.store_backend == "sqlite":
+                self._rows = SqliteRowStore.open(self.store_path, self.csv_path)
+            else:
+                self._rows = RowStore.load(self.csv_path)
+        return self._rows
+
+    def create_table(self, rows: List[Dict[str, str]], cols: List[str]) -> RowStore:
+        """Replace the working rows (init builds them from the bib file)."""
+        if self.store_backend == "sqlite":
+            self._rows = SqliteRowStore.create(self.store_path, rows, cols)
+        else:
+            self._rows = RowStore(rows, cols)
+        return self._rows
+
+    def resolution_cache(self) -> Dict[str, Any]:
+        if self._res_cache is None:
+            self._res_cache = {}
+            if self.res_cache_path.exists():
+                try:
+                    self._res_cache = json.loads(self.res_cache_path.read_text(encoding="utf-8"))
+                except Exception:
+                    self._res_cache = {}
+        return self._res_cache
+
+    def save_resolution_cache(self, cache: Dict[str, Any]) -> None:
+        self._res_cache = cache
+        self._res_cache_dirty = True
+
+    def write_text(self, name: str, text: str) -> None:
+        """Queue out_dir/name to be written by flush()."""
+        self._pending[name] = text
+
+    def write_csv(self, name: str, rows: List[Dict[str, str]], cols: List[str]) -> None:
+        self._pending[name] = (list(rows), list(cols))
+
+    def end_stage(self) -> None:
+        if self.checkpoint:
+            self.flush()
+
+    def flush(self) -> None:
+        for name, body in self._pending.items():
+            path = self.out_dir / name
+            if isinstance(body, tuple):
+                write_rows_atomic(path, *body)
+            else:
+                path.write_text(body, encoding="utf-8")
+        self._pending.clear()
+        if self._res_cache_dirty:
+            self.res_cache_path.write_text(json.dumps(self._res_cache, indent=2), encoding="utf-8")
+            self._res_cache_dirty = False
+        if self._rows is not None:
+            self._rows.write(self.csv_path)
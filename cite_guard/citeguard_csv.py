@@ -1,16 +1,18 @@
 from __future__ import annotations
-import csv, re
+import csv, io, re
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterator, List, Optional, Tuple
 
 STAGES = ["audit", "resolve", "ground", "venue", "ml"]
 IDENTITY_COLS = ["bib_key", "bib_source_file", "bib_entry_type", "bib_raw"]
 FINAL_COLS = ["reference_quality_score", "reference_quality_notes", "review_priority"]
+# stage-specific columns beyond quality/confidence/remediation
+EXTRA_COLS = {"audit": ["audit_duplicate_cluster"]}
 
 def required_columns() -> List[str]:
     cols = IDENTITY_COLS[:]
     for st in STAGES:
-        cols += [f"{st}_quality", f"{st}_confidence", f"{st}_remediation"]
+        cols += [f"{st}_quality", f"{st}_confidence", f"{st}_remediation"] + EXTRA_COLS.get(st, [])
     cols += FINAL_COLS
     return cols
 
@@ -29,16 +31,101 @@ def write_rows_atomic(csv_path: Path, rows: List[Dict[str,str]], fieldnames: Lis
         w.writerows(rows)
     tmp.replace(csv_path)
 
+def ensure_columns(rows: List[Dict[str,str]], fieldnames: List[str], names: List[str], after: Optional[str] = None) -> List[str]:
+    """Add missing columns (empty in every row) to CSVs written before they existed."""
+    cols = fieldnames[:]
+    pos = cols.index(after) + 1 if after in cols else len(cols)
+    for n in names:
+        if n not in cols:
+            cols.insert(pos, n)
+            pos += 1
+            for r in rows:
+                r.setdefault(n, "")
+    return cols
+
 def filter_rows(rows: List[Dict[str,str]], only_regex: Optional[str]) -> List[Dict[str,str]]:
     if not only_regex:
         return rows
     rx = re.compile(only_regex)
     return [r for r in rows if rx.search(r.get("bib_key",""))]
 
-def update_row(rows: List[Dict[str,str]], bib_key: str, updates: Dict[str,str]) -> None:
-    for r in rows:
-        if r.get("bib_key") == bib_key:
-            for k,v in updates.items():
-                r[k]=str(v)
+class RowStore:
+    """audit_references.csv rows in file order, indexed by bib_key.
+
+    Lookups and updates are O(1). Rows whose values actually change are
+    marked dirty; write() reuses the serialized line of every clean row it
+    has written before and skips the file entirely when nothing changed.
+    With duplicate keys, the key refers to the first row.
+    """
+    def __init__(self, rows: List[Dict[str,str]], fieldnames: List[str], dirty: bool = True):
+        self.rows = rows
+        self.fieldnames = list(fieldnames)
+        self.index: Dict[str,int] = {}
+        for i, r in enumerate(rows):
+            self.index.setdefault(r.get("bib_key",""), i)
+        self.lines: List[Optional[str]] = [None] * len(rows)
+        self.dirty = dirty
+
+    @classmethod
+    def load(cls, csv_path: Path) -> "RowStore":
+        rows, fieldnames = load_rows(csv_path)
+        return cls(rows, fieldnames, dirty=False)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __iter__(self) -> Iterator[Dict[str,str]]:
+        return iter(self.rows)
+
+    def __contains__(self, bib_key: str) -> bool:
+        return bib_key in self.index
+
+    def get(self, bib_key: str) -> Optional[Dict[str,str]]:
+        i = self.index.get(bib_key)
+        return None if i is None else self.rows[i]
+
+    def filter(self, only_regex: Optional[str]) -> List[Dict[str,str]]:
+        return filter_rows(self.rows, only_regex)
+
+    def update(self, bib_key: str, updates: Dict[str,str]) -> None:
+        i = self.index.get(bib_key)
+        if i is None:
+            raise KeyError(f"bib_key not found: {bib_key}")
+        self.update_at(i, updates)
+
+    def update_at(self, i: int, updates: Dict[str,str]) -> None:
+        r = self.rows[i]
+        for k, v in updates.items():
+            v = str(v)
+            if r.get(k) != v:
+                r[k] = v
+                self.lines[i] = None
+                self.dirty = True
+
+    def ensure_columns(self, names: List[str], after: Optional[str] = None) -> None:
+        cols = ensure_columns(self.rows, self.fieldnames, names, after)
+        if cols != self.fieldnames:
+            self.fieldnames = cols
+            self.lines = [None] * len(self.rows)
+            self.dirty = True
+
+    def write(self, csv_path: Path) -> None:
+        """Atomically write the CSV if anything changed since it was loaded or last written."""
+        if not self.dirty:
             return
-    raise KeyError(f"bib_key not found: {bib_key}")
+        buf = io.StringIO()
+        w = csv.DictWriter(buf, fieldnames=self.fieldnames)
+        w.writeheader()
+        tmp = csv_path.with_suffix(".tmp")
+        with tmp.open("w", newline="", encoding="utf-8") as f:
+            f.write(buf.getvalue())
+            for i, r in enumerate(self.rows):
+                line = self.lines[i]
+                if line is None:
+                    buf.seek(0)
+                    buf.truncate()
+                    w.writerow(r)
+                    line = self.lines[i] = buf.getvalue()
+                f.write(line)
+        tmp.replace(csv_path)
+        self.dirty = False
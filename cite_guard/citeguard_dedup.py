@@ -0,0 +1,118 @@
+from __future__ import annotations
+from collections import defaultdict
+from typing import Dict, List, Optional, Sequence, Tuple
+import zlib
+
+from citeguard_similarity import normalize, last_names
+
+# Near-duplicate BibTeX entries (same paper under several keys: arXiv vs
+# proceedings version, typo'd titles) without comparing every pair.
+# Each entry is shingled into character 3-grams of its normalized title plus
+# its first authors' last names, summarized by a MinHash signature, and the
+# signatures are split into LSH bands: only entries that share a band bucket
+# are compared, and only those whose estimated similarity clears `threshold`
+# are joined into clusters. Cost is linear in the number of entries plus the
+# (small) number of colliding pairs.
+#
+# Signatures use one-permutation hashing: every shingle is hashed once and
+# lands in one of `num_perm` bins, keeping the minimum per bin; empty bins
+# borrow from the next non-empty one. That is the same estimator as classic
+# k-permutation MinHash at 1/k of the hashing work, which matters in pure
+# Python on 50k-entry bibliographies.
+
+NUM_PERM = 64
+BANDS = 16
+MAX_BUCKET = 200
+_MIX = 0x9E3779B1
+_MASK = 0xFFFFFFFF
+
+def shingles(title: str, authors: str, max_authors: int = 3) -> set[str]:
+    t = normalize(title)
+    out = {t[i:i+3] for i in range(len(t) - 2)} if len(t) >= 3 else ({t} if t else set())
+    out.update("@" + n for n in last_names(authors)[:max_authors])
+    return out
+
+def minhash(sh: set[str], num_perm: int = NUM_PERM) -> Optional[Tuple[int, ...]]:
+    if not sh:
+        return None
+    bins = [_MASK + 1] * num_perm
+    for s in sh:
+        h = (zlib.crc32(s.encode("utf-8")) * _MIX) & _MASK
+        b = h % num_perm
+        v = h // num_perm
+        if v < bins[b]:
+            bins[b] = v
+    # densify: an empty bin takes the next filled bin's value (cyclically), offset by the distance
+    if _MASK + 1 in bins:
+        out = bins[:]
+        for i in range(num_perm):
+            if bins[i] > _MASK:
+                d = 1
+                while bins[(i + d) % num_perm] > _MASK:
+                    d += 1
+                out[i] = bins[(i + d) % num_perm] + d * (_MASK + 1)
+        bins = out
+    return tuple(bins)
+
+def estimate(a: Sequence[int], b: Sequence[int]) -> float:
+    return sum(1 for x, y in zip(a, b) if x == y) / len(a)
+
+def _same_context(i: int, j: int, years: Sequence[Optional[int]], dois: Sequence[str], venues: Sequence[str]) -> bool:
+    return bool((years[i] and years[i] == years[j]) or (dois[i] and dois[i] == dois[j])
+                or (venues[i] and venues[i] == venues[j]))
+
+def find_duplicate_clusters(entries: Sequence[Tuple[str, str, str, Optional[int], str, str]], threshold: float = 0.7,
+                            num_perm: int = NUM_PERM, bands: int = BANDS, max_bucket: int = MAX_BUCKET
+                            ) -> List[List[str]]:
+    """Cluster (key, title, authors, year, doi, venue) entries whose title+author shingles nearly match.
+
+    Years more than one apart (not arXiv vs proceedings) keep entries apart.
+    Two author-less entries (front matter, standards, web pages) match on the
+    title alone, so they also need the same year, DOI or venue.
+    Buckets larger than `max_bucket` (boilerplate titles such as "Preface")
+    are skipped rather than compared all-pairs. Clusters come back in the
+    order of their first entry, members in input order.
+    """
+    rows = max(1, num_perm // bands)
+    sigs: List[Optional[Tuple[int, ...]]] = [minhash(shingles(t, a), num_perm) for _, t, a, _, _, _ in entries]
+    years = [y for _, _, _, y, _, _ in entries]
+    authorless = [not last_names(a) for _, _, a, _, _, _ in entries]
+    dois = [(d or "").strip().lower() for *_, d, _ in entries]
+    venues = [normalize(v or "") for *_, v in entries]
+
+    parent = list(range(len(entries)))
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    seen = set()
+    for band in range(bands):
+        buckets: Dict[Tuple[int, ...], List[int]] = defaultdict(list)
+        lo = band * rows
+        for i, sig in enumerate(sigs):
+            if sig is not None:
+                buckets[sig[lo:lo+rows]].append(i)
+        for members in buckets.values():
+            if len(members) < 2 or len(members) > max_bucket:
+                continue
+            for x in range(len(members)):
+                for y in range(x + 1, len(members)):
+                    i, j = members[x], members[y]
+                    if (i, j) in seen:
+                        continue
+                    seen.add((i, j))
+                    if years[i] and years[j] and abs(years[i] - years[j]) > 1:
+                        continue
+                    if authorless[i] and authorless[j] and not _same_context(i, j, years, dois, venues):
+                        continue
+                    if estimate(sigs[i], sigs[j]) >= threshold:
+                        ri, rj = find(i), find(j)
+                        if ri != rj:
+                            parent[max(ri, rj)] = min(ri, rj)
+
+    groups: Dict[int, List[int]] = defaultdict(list)
+    for i in range(len(entries)):
+        groups[find(i)].append(i)
+    return [[entries[i][0] for i in g] for _, g in sorted(groups.items()) if len(g) > 1]
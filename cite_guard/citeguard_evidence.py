@@ -1,17 +1,18 @@
 from __future__ import annotations
 from dataclasses import dataclass
 from pathlib import Path
-from typing import List, Optional, Tuple, Dict
-import re, os, time, json
+from typing import Dict, Iterator, List, Optional, Tuple
+import hashlib, re, os, time, json
 
-try:
-    import requests
-except Exception:
-    requests = None
+from citeguard_http import get_client
+from citeguard_evidence_store import get_evidence_store
+from citeguard_fetch_pipeline import get_host_gate
 
 try:
+    import bs4
     from bs4 import BeautifulSoup
 except Exception:
+    bs4 = None
     BeautifulSoup = None
 
 try:
@@ -25,95 +26,271 @@ class EvidenceArtifact:
     path: str
     fmt: str
     bytes: int
+    sha256: str = ""
+
+CHUNK_SIZE = 65536
+
+def _infer_fmt(url: str, content_type: str) -> str:
+    ct = (content_type or "").lower()
+    u = url.lower()
+    if "text/markdown" in ct or u.endswith(".md"):
+        return "md"
+    if "text/html" in ct or u.endswith((".html",".htm")):
+        return "html"
+    if u.endswith(".tex"):
+        return "tex"
+    if u.endswith(".rtf"):
+        return "rtf"
+    if "text/plain" in ct or u.endswith(".txt"):
+        return "txt"
+    if "application/pdf" in ct or u.endswith(".pdf"):
+        return "pdf"
+    return "bin"
+
+def fetch_url(url: str, timeout: int, max_bytes: int, user_agent: str,
+              probe_exts: Optional[List[str]] = None) -> Optional[EvidenceArtifact]:
+    """Fetch `url` into the content-addressed evidence store.
 
-def _safe_filename(s: str) -> str:
-    s = re.sub(r'[^A-Za-z0-9._-]+','_',s)
-    return s[:160]
+    A URL checked within the store's freshness window is returned without a
+    request; an older one is revalidated with If-None-Match/If-Modified-Since
+    and a 304 reuses the stored blob. New bodies are streamed to a temp file
+    and hashed on the way, so memory stays at one chunk per download. Bodies
+    over max_bytes (by Content-Length or as they arrive) are abandoned; the
+    temp file is only moved into the store once complete. With `probe_exts`,
+    a URL not yet in the store is first checked with HEAD (see _probe).
+    """
+    store = get_evidence_store()
+    with store.url_lock(url):
+        known = store.lookup(url)
+        if known and store.is_fresh(known):
+            store.touch(url, known, "fresh")
+            return _stored_artifact(url, store, known)
+        client = get_client()
+        if not client.available:
+            return None
+        if probe_exts is not None and not known and not _probe(url, probe_exts, timeout, max_bytes, user_agent):
+            return None
+        headers = {"User-Agent": user_agent, **store.conditional_headers(known)}
+        with get_host_gate().slot(url):
+            return _download(client, store, url, known, headers, timeout, max_bytes)
 
-def fetch_url(url: str, out_dir: Path, timeout: int, max_bytes: int, user_agent: str) -> Optional[EvidenceArtifact]:
-    if requests is None:
+def _download(client, store, url: str, known: Optional[dict], headers: dict, timeout: int, max_bytes: int) -> Optional[EvidenceArtifact]:
+    r = None
+    tmp = None
+    try:
+        r = client.get(url, headers=headers, timeout=timeout, stream=True)
+        if r is not None and r.status_code == 304 and known:
+            store.touch(url, known, "revalidated")
+            return _stored_artifact(url, store, known)
+        if r is None or r.status_code != 200:
+            return None
+        length = r.headers.get("content-length")
+        if length and length.isdigit() and int(length) > max_bytes:
+            return None
+        fd, tmp = store.temp_file()
+        h = hashlib.sha256()
+        size = 0
+        with os.fdopen(fd, "wb") as f:
+            for chunk in r.iter_content(chunk_size=CHUNK_SIZE):
+                if not chunk:
+                    continue
+                size += len(chunk)
+                if size > max_bytes:
+                    return None
+                h.update(chunk)
+                f.write(chunk)
+        fmt = _infer_fmt(url, r.headers.get("content-type",""))
+        sha = h.hexdigest()
+        path = store.commit(url, tmp, sha, fmt, size, r.headers.get("etag"), r.headers.get("last-modified"))
+        tmp = None
+        return EvidenceArtifact(url=url, path=str(path), fmt=fmt, bytes=size, sha256=sha)
+    except Exception:
         return None
-    headers = {"User-Agent": user_agent}
+    finally:
+        if r is not None:
+            r.close()
+        if tmp is not None:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+
+def _stored_artifact(url: str, store, entry: dict) -> EvidenceArtifact:
+    return EvidenceArtifact(url=url, path=str(store.blob_path(entry["sha256"])), fmt=entry["fmt"],
+                            bytes=entry["size"], sha256=entry["sha256"])
+
+PDF_MAX_PAGES = 25  # cap pages for lightweight
+_text_stats = {"cached": 0, "extracted": 0, "in_workers": 0, "stopped_early": 0}
+
+def extractor_version(fmt: str) -> str:
+    """Identifies the code path that turns `fmt` into text; cached text from another version is re-extracted."""
+    if fmt == "html":
+        return f"bs4-{bs4.__version__}" if BeautifulSoup is not None else "strip-tags-1"
+    if fmt == "pdf":
+        return f"pypdf2-{PyPDF2.__version__}-{PDF_MAX_PAGES}p" if PyPDF2 is not None else "none"
+    return "raw"
+
+def _text_cache_paths(artifact: EvidenceArtifact) -> Tuple[Path, Path]:
+    base = Path(artifact.path).with_name(f"{artifact.sha256}.{artifact.fmt}")
+    return base.with_suffix(base.suffix + ".text"), base.with_suffix(base.suffix + ".text.json")
+
+def _load_cached_pages(artifact: EvidenceArtifact) -> Optional[Tuple[List[str], bool]]:
+    """(pages, complete) from the text cache; complete=False when an earlier run stopped early."""
+    if not artifact.sha256 or artifact.fmt not in ("html","pdf"):
+        return None
+    text_path, meta_path = _text_cache_paths(artifact)
     try:
-        r = requests.get(url, headers=headers, timeout=timeout, stream=True)
-        if r.status_code != 200:
+        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        if meta.get("extractor") != extractor_version(artifact.fmt) or meta.get("sha256") != artifact.sha256:
             return None
-        content = b""
-        size=0
-        for chunk in r.iter_content(chunk_size=65536):
-            if not chunk:
-                continue
-            content += chunk
-            size += len(chunk)
-            if size > max_bytes:
-                return None
-        # infer fmt
-        ct = (r.headers.get("content-type","") or "").lower()
-        fmt = "bin"
-        if "text/markdown" in ct or url.lower().endswith(".md"):
-            fmt="md"
-        elif "text/html" in ct or url.lower().endswith((".html",".htm")):
-            fmt="html"
-        elif url.lower().endswith(".tex"):
-            fmt="tex"
-        elif url.lower().endswith(".rtf"):
-            fmt="rtf"
-        elif "text/plain" in ct or url.lower().endswith(".txt"):
-            fmt="txt"
-        elif "application/pdf" in ct or url.lower().endswith(".pdf"):
-            fmt="pdf"
-        name = _safe_filename(url.split("/")[-1] or "artifact")
-        if "." not in name and fmt in ("md","html","tex","rtf","txt","pdf"):
-            name = f"{name}.{fmt}"
-        path = out_dir / name
-        path.write_bytes(content)
-        return EvidenceArtifact(url=url, path=str(path), fmt=fmt, bytes=size)
+        return text_path.read_text(encoding="utf-8").split("\f"), bool(meta.get("complete", True))
     except Exception:
         return None
 
-def extract_text_from_artifact(artifact: EvidenceArtifact) -> str:
+def _store_cached_pages(artifact: EvidenceArtifact, pages: List[str], complete: bool = True) -> None:
+    if not artifact.sha256 or artifact.fmt not in ("html","pdf") or not pages:
+        return
+    text_path, meta_path = _text_cache_paths(artifact)
+    try:
+        for path, body in ((text_path, "\f".join(pages)),
+                           (meta_path, json.dumps({"sha256": artifact.sha256, "fmt": artifact.fmt, "extractor": extractor_version(artifact.fmt),
+                                                   "pages": len(pages), "complete": complete}))):
+            tmp = path.with_name(path.name + f".{os.getpid()}.tmp")
+            tmp.write_text(body, encoding="utf-8")
+            os.replace(tmp, path)
+    except Exception:
+        pass
+
+def _extract_pages(artifact: EvidenceArtifact, start: int = 0) -> Iterator[str]:
+    """Text per page (one page for non-PDF formats), extracted only as the caller asks for it."""
     p = Path(artifact.path)
     if artifact.fmt in ("md","txt","tex","rtf"):
         try:
-            return p.read_text(encoding="utf-8", errors="ignore")
+            yield p.read_text(encoding="utf-8", errors="ignore")
         except Exception:
-            return ""
-    if artifact.fmt == "html":
+            yield ""
+    elif artifact.fmt == "html":
         try:
             html = p.read_text(encoding="utf-8", errors="ignore")
             if BeautifulSoup is None:
                 # crude strip tags
-                return re.sub(r'<[^>]+>',' ', html)
-            soup = BeautifulSoup(html, "html.parser")
-            return soup.get_text("\n")
+                yield re.sub(r'<[^>]+>',' ', html)
+            else:
+                soup = BeautifulSoup(html, "html.parser")
+                yield soup.get_text("\n")
         except Exception:
-            return ""
-    if artifact.fmt == "pdf":
-        if PyPDF2 is None:
-            return ""
+            yield ""
+    elif artifact.fmt == "pdf" and PyPDF2 is not None:
         try:
             reader = PyPDF2.PdfReader(str(p))
-            texts=[]
-            for page in reader.pages[:25]:  # cap pages for lightweight
-                t = page.extract_text() or ""
-                if t:
-                    texts.append(t)
-            return "\n".join(texts)
+            pages = reader.pages[start:PDF_MAX_PAGES]
         except Exception:
-            return ""
-    return ""
+            return
+        for page in pages:
+            try:
+                yield page.extract_text() or ""
+            except Exception:
+                yield ""
+
+def iter_artifact_pages(artifact: EvidenceArtifact) -> Iterator[str]:
+    """Lazily yield an artifact's text page by page.
+
+    Cached pages come first; pages past the cache are extracted on demand,
+    so a consumer that stops early never parses the rest of the PDF. Whatever
+    was read is written back to the text cache (marked incomplete if the
+    consumer stopped before the end) for the next run to resume from.
+    """
+    cached = _load_cached_pages(artifact)
+    pages, complete = cached if cached is not None else ([], False)
+    extracted = False
+    finished = False
+    try:
+        yield from pages
+        if not complete:
+            for t in _extract_pages(artifact, start=len(pages)):
+                extracted = True
+                pages.append(t)
+                yield t
+        finished = True
+    finally:
+        if extracted or (cached is None and finished):
+            _store_cached_pages(artifact, pages, complete=finished)
+        if artifact.fmt in ("html","pdf"):
+            _text_stats["extracted" if extracted or cached is None else "cached"] += 1
+            if not finished:
+                _text_stats["stopped_early"] += 1
+
+def extract_text_from_artifact(artifact: EvidenceArtifact) -> str:
+    """Plain text of an artifact. HTML/PDF extractions are cached next to the
+    blob, keyed by its sha256 and the extractor version, so unchanged evidence
+    is parsed once."""
+    return "\n".join(t for t in iter_artifact_pages(artifact) if t)
+
+def needs_extraction(artifact: EvidenceArtifact) -> bool:
+    """True for a PDF whose complete text is not cached yet (worth sending to an extraction worker)."""
+    if artifact.fmt != "pdf" or PyPDF2 is None:
+        return False
+    cached = _load_cached_pages(artifact)
+    return cached is None or not cached[1]
 
-def discover_linked_artifacts(landing_url: str, prefer_exts: List[str], out_dir: Path, timeout: int, max_bytes: int, user_agent: str) -> List[EvidenceArtifact]:
-    """Fetch landing page HTML and look for links to preferred extensions."""
+def extract_to_cache(artifact: EvidenceArtifact) -> int:
+    """Fully extract an artifact into the text cache; runs in --extract-workers processes."""
+    return sum(1 for _ in iter_artifact_pages(artifact))
+
+def count_worker_extraction() -> None:
+    _text_stats["in_workers"] += 1
+
+def text_cache_report_lines() -> List[str]:
+    st = _text_stats
+    if not any(st.values()):
+        return []
+    return [f"- extracted text: from cache={st['cached']} parsed={st['extracted']} parsed_in_workers={st['in_workers']} "
+            f"stopped_early={st['stopped_early']}\n"]
+
+# (url, preferred formats, size budget) of links a HEAD probe rejected in
+# this run (wrong format or too large); reset by each ground run
+_probe_rejected: set = set()
+
+def reset_probe_cache() -> None:
+    _probe_rejected.clear()
+
+def _probe(url: str, prefer_exts: List[str], timeout: int, max_bytes: int, user_agent: str) -> bool:
+    """HEAD a candidate link: keep it only if it is reachable, in a preferred
+    format and within the size budget. Servers that refuse HEAD get the benefit
+    of the doubt (fetch_url still enforces max_bytes)."""
+    key = (url, tuple(prefer_exts), max_bytes)
+    if key in _probe_rejected:
+        return False
+    client = get_client()
+    with get_host_gate().slot(url):
+        r = client.head(url, headers={"User-Agent": user_agent}, timeout=timeout, allow_redirects=True)
+    if r is None:
+        return False
+    try:
+        if r.status_code in (405, 501):
+            return True
+        if r.status_code != 200:
+            return False
+        length = r.headers.get("content-length")
+        if length and length.isdigit() and int(length) > max_bytes:
+            _probe_rejected.add(key)
+            return False
+        fmt = _infer_fmt(url, r.headers.get("content-type",""))
+        if fmt not in prefer_exts:
+            _probe_rejected.add(key)
+            return False
+        return True
+    finally:
+        r.close()
+
+def discover_linked_artifacts(landing: EvidenceArtifact, prefer_exts: List[str], timeout: int, max_bytes: int, user_agent: str) -> List[EvidenceArtifact]:
+    """Look for links to preferred extensions in an already-fetched HTML landing page."""
     arts: List[EvidenceArtifact] = []
-    if requests is None:
+    client = get_client()
+    if not client.available:
         return arts
-    headers={"User-Agent": user_agent}
     try:
-        r = requests.get(landing_url, headers=headers, timeout=timeout)
-        if r.status_code != 200:
-            return arts
-        html = r.text
+        html = Path(landing.path).read_text(encoding="utf-8", errors="ignore")
         if BeautifulSoup is None:
             hrefs = re.findall(r'href=["\']([^"\']+)["\']', html, flags=re.IGNORECASE)
         else:
@@ -123,7 +300,7 @@ def discover_linked_artifacts(landing_url: str, prefer_exts: List[str], out_dir:
         from urllib.parse import urljoin
         cand=[]
         for h in hrefs:
-            u = urljoin(landing_url, h)
+            u = urljoin(landing.url, h)
             cand.append(u)
         # select unique by preference
         selected=[]
@@ -131,9 +308,9 @@ def discover_linked_artifacts(landing_url: str, prefer_exts: List[str], out_dir:
             for u in cand:
                 if u.lower().endswith("."+ext) and u not in selected:
                     selected.append(u)
-        # fetch top few
+        # fetch top few; links not yet in the store are probed with HEAD before a full download
         for u in selected[:8]:
-            art = fetch_url(u, out_dir, timeout, max_bytes, user_agent)
+            art = fetch_url(u, timeout, max_bytes, user_agent, probe_exts=prefer_exts)
             if art:
                 arts.append(art)
         return arts
@@ -0,0 +1,143 @@
+from __future__ import annotations
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import os, sqlite3, tempfile, threading, time
+
+from citeguard_response_cache import default_cache_path
+
+# Content-addressed store for fetched evidence, shared by every paper:
+#   blobs/<sha[:2]>/<sha256>   one file per distinct body
+#   manifest.sqlite            url -> sha256, format, size, ETag/Last-Modified
+# A URL fetched within `fresh_hours` is reused without any request; older
+# entries are revalidated with a conditional GET (304 = reuse the blob). The
+# same PDF reached from several keys, URLs or papers is stored once.
+
+def default_store_path() -> Path:
+    return default_cache_path().with_name("evidence")
+
+class EvidenceStore:
+    def __init__(self, root: Path, fresh_hours: float = 24):
+        self.root = Path(root)
+        self.fresh_sec = float(fresh_hours) * 3600
+        self.stats = {"fresh": 0, "revalidated": 0, "downloaded": 0, "deduplicated": 0, "bytes_downloaded": 0}
+        self.lock = threading.Lock()
+        self.url_locks: Dict[str, threading.Lock] = {}
+        (self.root / "blobs").mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(str(self.root / "manifest.sqlite"), timeout=30, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS manifest ("
+            " url TEXT PRIMARY KEY, sha256 TEXT NOT NULL, fmt TEXT NOT NULL, size INTEGER NOT NULL,"
+            " etag TEXT, last_modified TEXT, checked REAL NOT NULL)")
+        self.db.commit()
+
+    def blob_path(self, sha: str) -> Path:
+        return self.root / "blobs" / sha[:2] / sha
+
+    def url_lock(self, url: str) -> threading.Lock:
+        """Per-URL lock so concurrent fetches of one URL download it once."""
+        with self.lock:
+            lk = self.url_locks.get(url)
+            if lk is None:
+                lk = self.url_locks[url] = threading.Lock()
+            return lk
+
+    def lookup(self, url: str) -> Optional[Dict[str, Any]]:
+        """Manifest entry for url, or None if unknown or its blob has gone missing."""
+        with self.lock:
+            row = self.db.execute("SELECT sha256, fmt, size, etag, last_modified, checked FROM manifest WHERE url=?", (url,)).fetchone()
+        if row is None or not self.blob_path(row[0]).exists():
+            return None
+        return {"sha256": row[0], "fmt": row[1], "size": row[2], "etag": row[3], "last_modified": row[4], "checked": row[5]}
+
+    def is_fresh(self, entry: Dict[str, Any]) -> bool:
+        return time.time() - entry["checked"] < self.fresh_sec
+
+    def conditional_headers(self, entry: Optional[Dict[str, Any]]) -> Dict[str, str]:
+        h = {}
+        if entry and entry.get("etag"):
+            h["If-None-Match"] = entry["etag"]
+        if entry and entry.get("last_modified"):
+            h["If-Modified-Since"] = entry["last_modified"]
+        return h
+
+    def temp_file(self) -> tuple:
+        """(fd, path) of a temp file on the blob filesystem, so commit() is a rename."""
+        return tempfile.mkstemp(dir=str(self.root / "blobs"), prefix=".part-")
+
+    def commit(self, url: str, tmp_path: str, sha: str, fmt: str, size: int,
+               etag: Optional[str], last_modified: Optional[str]) -> Path:
+        """Move a completed download into place (or drop it if the blob exists) and record url -> blob."""
+        dest = self.blob_path(sha)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        if dest.exists():
+            os.unlink(tmp_path)
+            self._count("deduplicated")
+        else:
+            os.replace(tmp_path, dest)
+            self._count("downloaded")
+        self._count("bytes_downloaded", size)
+        self._record(url, sha, fmt, size, etag, last_modified)
+        return dest
+
+    def touch(self, url: str, entry: Dict[str, Any], count: str) -> None:
+        """Mark a manifest entry as just checked (`count`: fresh|revalidated)."""
+        self._count(count)
+        if count == "revalidated":
+            with self.lock:
+                self.db.execute("UPDATE manifest SET checked=? WHERE url=?", (time.time(), url))
+                self.db.commit()
+
+    def _record(self, url, sha, fmt, size, etag, last_modified) -> None:
+        with self.lock:
+            self.db.execute("INSERT OR REPLACE INTO manifest(url, sha256, fmt, size, etag, last_modified, checked) VALUES (?,?,?,?,?,?,?)",
+                            (url, sha, fmt, size, etag, last_modified, time.time()))
+            self.db.commit()
+
+    def _count(self, what: str, n: int = 1) -> None:
+        with self.lock:
+            self.stats[what] += n
+
+    def report_lines(self) -> List[str]:
+        st = self.stats
+        if not any(st.values()):
+            return []
+        return ["\n## Evidence store\n",
+                f"- fresh (no request)={st['fresh']} revalidated (304)={st['revalidated']} downloaded={st['downloaded']} "
+                f"deduplicated={st['deduplicated']} bytes_downloaded={st['bytes_downloaded']}\n"]
+
+    def close(self) -> None:
+        with self.lock:
+            self.db.close()
+
+_store: Optional[EvidenceStore] = None
+
+def configure(cfg: Dict[str, Any], fallback_root: Optional[Path] = None) -> EvidenceStore:
+    """(Re)open the shared evidence store from the `evidence_store` config block.
+
+    If the store cannot be created (unwritable cache dir, locked manifest),
+    a per-run store under `fallback_root` is used instead.
+    """
+    global _store
+    es = cfg.get("evidence_store") or {}
+    if _store is not None:
+        _store.close()
+        _store = None
+    root = Path(os.path.expanduser(str(es["path"]))) if es.get("path") else default_store_path()
+    fresh_hours = float(es.get("fresh_hours", 24))
+    try:
+        _store = EvidenceStore(root, fresh_hours=fresh_hours)
+    except (OSError, sqlite3.Error):
+        if fallback_root is None:
+            raise
+        _store = EvidenceStore(fallback_root, fresh_hours=fresh_hours)
+    return _store
+
+def get_evidence_store() -> EvidenceStore:
+    global _store
+    if _store is None:
+        _store = EvidenceStore(default_store_path())
+    return _store
+
+def stats_report_lines() -> List[str]:
+    return _store.report_lines() if _store is not None else []
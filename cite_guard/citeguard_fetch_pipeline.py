@@ -0,0 +1,62 @@
+from __future__ import annotations
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, Tuple
+from urllib.parse import urlparse
+import threading, time
+
+# Concurrent evidence acquisition for ground --fetch. Every target reference's
+# evidence is fetched up front on `jobs` worker threads; iter_completed()
+# hands results back as they finish so claim scoring overlaps the downloads.
+# Downloads pass through a HostGate: at most `per_host` in flight per host,
+# and consecutive request starts on one host at least `politeness_delay_sec`
+# apart (on top of the rate_limits token buckets).
+
+class HostGate:
+    def __init__(self, per_host: int = 2, politeness_delay_sec: float = 0.0):
+        self.per_host = max(1, per_host)
+        self.delay = max(0.0, politeness_delay_sec)
+        self.sems: Dict[str, threading.BoundedSemaphore] = {}
+        self.next_start: Dict[str, float] = {}
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def slot(self, url: str):
+        host = urlparse(url).netloc.lower()
+        with self.lock:
+            sem = self.sems.get(host)
+            if sem is None:
+                sem = self.sems[host] = threading.BoundedSemaphore(self.per_host)
+        with sem:
+            if self.delay:
+                with self.lock:
+                    now = time.monotonic()
+                    start = max(now, self.next_start.get(host, 0.0))
+                    self.next_start[host] = start + self.delay
+                if start > now:
+                    time.sleep(start - now)
+            yield
+
+_gate = HostGate(per_host=1 << 16)
+
+def configure(cfg: Dict[str, Any]) -> HostGate:
+    """Reset the shared host gate from the `ground_fetch` config block."""
+    global _gate
+    gf = cfg.get("ground_fetch") or {}
+    _gate = HostGate(int(gf.get("per_host", 2)), float(gf.get("politeness_delay_sec", 0)))
+    return _gate
+
+def get_host_gate() -> HostGate:
+    return _gate
+
+def iter_completed(keys: Iterable[str], acquire: Callable[[str], Any], jobs: int = 1) -> Iterator[Tuple[str, Any]]:
+    """Yield (key, acquire(key)) in completion order, running up to `jobs` at once."""
+    keys = list(keys)
+    if jobs <= 1 or len(keys) <= 1:
+        for k in keys:
+            yield k, acquire(k)
+        return
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        futs = {pool.submit(acquire, k): k for k in keys}
+        for fut in as_completed(futs):
+            yield futs[fut], fut.result()
@@ -0,0 +1,205 @@
+from __future__ import annotations
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlparse
+import asyncio, threading, time
+
+try:
+    import requests
+    from requests.adapters import HTTPAdapter
+except Exception:
+    requests = None
+    HTTPAdapter = None
+
+from citeguard_ratelimit import HostRateLimiter, backoff_delay, parse_retry_after
+
+# Shared HTTP layer for resolve backends and evidence fetching. One pooled
+# session keeps connections alive per host instead of a TCP+TLS handshake
+# per request; timeouts, compression, per-host rate limits and retries are
+# applied uniformly.
+
+RETRY_STATUS = (429, 500, 502, 503, 504)
+DEFAULT_HEADERS = {"Accept-Encoding": "gzip, deflate"}
+STREAM_CHUNK = 65536
+
+class HttpClient:
+    def __init__(self, timeout: int = 25, user_agent: str = "", retries: int = 2,
+                 backoff_sec: float = 0.5, pool_size: int = 16, throttle_retries: int = 5,
+                 max_backoff_sec: float = 120.0, limiter: Optional[HostRateLimiter] = None):
+        self.timeout = timeout
+        self.user_agent = user_agent
+        self.retries = max(0, retries)
+        self.backoff_sec = backoff_sec
+        self.pool_size = max(1, pool_size)
+        self.throttle_retries = max(0, throttle_retries)
+        self.max_backoff_sec = max_backoff_sec
+        self.limiter = limiter or HostRateLimiter()
+        self._session = None
+        self._lock = threading.Lock()
+
+    @property
+    def available(self) -> bool:
+        return requests is not None
+
+    def session(self):
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    s = requests.Session()
+                    # urllib3 keeps one pool per host; pool_maxsize bounds idle keep-alive sockets per host
+                    adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+                    s.mount("http://", adapter)
+                    s.mount("https://", adapter)
+                    self._session = s
+        return self._session
+
+    def _headers(self, headers: Optional[dict]) -> dict:
+        h = dict(DEFAULT_HEADERS)
+        if self.user_agent:
+            h["User-Agent"] = self.user_agent
+        h.update(headers or {})
+        return h
+
+    def request(self, method: str, url: str, params: Optional[dict] = None, headers: Optional[dict] = None,
+                timeout: Optional[int] = None, stream: bool = False, **kw):
+        """Send a request through the host's rate limiter with the shared retry policy.
+
+        Connection errors and 5xx use `retries` attempts with jittered
+        exponential backoff; 429 (and 503 with Retry-After) use
+        `throttle_retries` and honour the server's Retry-After for every caller
+        of that host. Returns the final response (any status) or None when the
+        host could not be reached.
+        """
+        if requests is None:
+            return None
+        host = urlparse(url).netloc.lower()
+        kw.setdefault("allow_redirects", True)
+        errors = throttles = 0
+        while True:
+            self.limiter.acquire(host)
+            try:
+                r = self.session().request(method, url, params=params, headers=self._headers(headers),
+                                           timeout=timeout or self.timeout, stream=stream, **kw)
+            except Exception:
+                r = None
+            if r is not None and r.status_code not in RETRY_STATUS:
+                return r
+            retry_after = parse_retry_after(r.headers.get("Retry-After")) if r is not None else None
+            if r is not None and (r.status_code == 429 or (r.status_code == 503 and retry_after is not None)):
+                throttles += 1
+                if retry_after is None:
+                    retry_after = backoff_delay(throttles, self.backoff_sec, self.max_backoff_sec)
+                # the bucket pause makes the next acquire() wait, for this and every other thread
+                self.limiter.throttled(host, min(retry_after, self.max_backoff_sec))
+                if throttles > self.throttle_retries:
+                    break
+            else:
+                errors += 1
+                if errors > self.retries:
+                    break
+                time.sleep(backoff_delay(errors, self.backoff_sec, self.max_backoff_sec))
+            self.limiter.retried(host)
+            if r is not None:
+                r.close()
+        self.limiter.failed(host)
+        return r
+
+    def get(self, url: str, **kw):
+        return self.request("GET", url, **kw)
+
+    def head(self, url: str, **kw):
+        return self.request("HEAD", url, **kw)
+
+    def get_json(self, url: str, params: Optional[dict] = None, headers: Optional[dict] = None,
+                 timeout: Optional[int] = None) -> Optional[dict]:
+        r = self.get(url, params=params, headers=headers, timeout=timeout)
+        if r is None or r.status_code != 200:
+            return None
+        try:
+            return r.json()
+        except Exception:
+            return None
+
+    def close(self) -> None:
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+class AsyncHttpClient:
+    """asyncio front-end over the shared HttpClient.
+
+    Every call runs HttpClient.request in a worker thread, so awaiting callers
+    share its keep-alive pools, per-host rate limits, Retry-After handling,
+    retries and stats, and follow a configure() that rebuilds the client.
+    """
+    @property
+    def sync(self) -> HttpClient:
+        return get_client()
+
+    async def request(self, method: str, url: str, **kw):
+        return await asyncio.to_thread(self.sync.request, method, url, **kw)
+
+    async def get_json(self, url: str, params: Optional[dict] = None, headers: Optional[dict] = None,
+                       timeout: Optional[int] = None) -> Optional[dict]:
+        return await asyncio.to_thread(self.sync.get_json, url, params, headers, timeout)
+
+    async def get_bytes(self, url: str, headers: Optional[dict] = None, max_bytes: int = 0,
+                        timeout: Optional[int] = None) -> Optional[bytes]:
+        """Body of a 200 response, streamed; None once it exceeds max_bytes (by Content-Length or as it arrives)."""
+        def fetch() -> Optional[bytes]:
+            r = self.sync.get(url, headers=headers, timeout=timeout, stream=True)
+            if r is None:
+                return None
+            try:
+                if r.status_code != 200:
+                    return None
+                length = r.headers.get("content-length")
+                if max_bytes and length and length.isdigit() and int(length) > max_bytes:
+                    return None
+                buf = bytearray()
+                for chunk in r.iter_content(chunk_size=STREAM_CHUNK):
+                    buf += chunk
+                    if max_bytes and len(buf) > max_bytes:
+                        return None
+                return bytes(buf)
+            finally:
+                r.close()
+        return await asyncio.to_thread(fetch)
+
+_client: Optional[HttpClient] = None
+_client_lock = threading.Lock()
+
+def configure(cfg: Dict[str, Any], jobs: int = 1) -> HttpClient:
+    """(Re)build the shared client from config.yaml settings."""
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+        _client = HttpClient(
+            timeout=int(cfg.get("http_timeout_sec") or 25),
+            user_agent=str(cfg.get("user_agent") or ""),
+            retries=int(cfg.get("http_retries", 2)),
+            backoff_sec=float(cfg.get("http_backoff_sec", 0.5)),
+            pool_size=max(int(cfg.get("http_pool_size") or 16), jobs),
+            throttle_retries=int(cfg.get("http_throttle_retries", 5)),
+            max_backoff_sec=float(cfg.get("http_max_backoff_sec", 120)),
+            limiter=HostRateLimiter(cfg.get("rate_limits") or {}),
+        )
+    return _client
+
+def get_client() -> HttpClient:
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = HttpClient()
+    return _client
+
+def stats_report_lines() -> List[str]:
+    """Per-host request/throttle/retry counters for stage reports."""
+    lines = get_client().limiter.report_lines()
+    return (["\n## HTTP hosts\n"] + lines) if lines else []
+
+_async_client = AsyncHttpClient()
+
+def get_async_client() -> AsyncHttpClient:
+    return _async_client
@@ -0,0 +1,286 @@
+from __future__ import annotations
+from html.entities import name2codepoint
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import gzip, json, os, re, sqlite3, threading
+import xml.etree.ElementTree as ET
+
+from citeguard_resolve_backends import Candidate, arxiv_base_id, normalize_doi
+from citeguard_response_cache import default_cache_path
+from citeguard_similarity import normalize, jaccard, author_overlap, last_names
+
+# Offline metadata index for air-gapped resolve runs. `cite-guard index build`
+# ingests a DBLP XML dump and/or an OpenAlex works snapshot (JSONL, optionally
+# gzipped) into one SQLite file with:
+#   works         one row per record (title, authors, year, venue, ids)
+#   title_grams   word-bigram postings over the normalized title
+#   author_names  author last names
+#   doi_map / arxiv_map  exact identifier lookups
+# resolve_local() answers candidate queries from it with the same Candidate
+# shape (source="local") as the network backends.
+
+DBLP_RECORDS = {"article", "inproceedings", "proceedings", "book", "incollection", "phdthesis", "mastersthesis"}
+_XML_ENTITIES = {"amp", "lt", "gt", "quot", "apos"}
+_ENTITY_RE = re.compile(r'&([A-Za-z][A-Za-z0-9]*);')
+_ARXIV_URL_RE = re.compile(r'arxiv\.org/(abs|pdf)/(?P<id>\d{4}\.\d{4,5}|[a-z\-]+(\.[A-Z]{2})?/\d{7})', re.IGNORECASE)
+MAX_TITLE_HITS = 20
+MAX_QUERY_TERMS = 6        # rarest title bigrams / author names scanned per lookup
+MAX_POSTINGS = 1000        # postings read per bigram/name; commoner ones are stop words
+
+def default_index_path() -> Path:
+    return default_cache_path().with_name("local_index.sqlite")
+
+def title_grams(title: str) -> List[str]:
+    """Word bigrams of the normalized title (unigram for one-word titles)."""
+    toks = normalize(title).split()
+    if len(toks) < 2:
+        return toks
+    return sorted({f"{a} {b}" for a, b in zip(toks, toks[1:])})
+
+def _open_text(path: Path):
+    if str(path).endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", errors="ignore")
+    return path.open("r", encoding="utf-8", errors="ignore")
+
+def iter_dblp_xml(path: Path) -> Iterator[Dict[str, Any]]:
+    """Stream publication records out of a DBLP XML dump.
+
+    The dump relies on dblp.dtd for HTML entities (&uuml; ...); those are
+    rewritten to numeric references line by line so no DTD is needed.
+    """
+    def fix(m: re.Match) -> str:
+        name = m.group(1)
+        if name in _XML_ENTITIES or name not in name2codepoint:
+            return m.group(0)
+        return f"&#{name2codepoint[name]};"
+
+    parser = ET.XMLPullParser(events=("start", "end"))
+    root = None
+    with _open_text(path) as f:
+        for line in f:
+            if line.startswith("<!DOCTYPE"):
+                continue
+            parser.feed(_ENTITY_RE.sub(fix, line))
+            for ev, el in parser.read_events():
+                if root is None:
+                    root = el
+                if ev != "end" or el.tag not in DBLP_RECORDS:
+                    continue
+                title = "".join(el.find("title").itertext()).strip() if el.find("title") is not None else ""
+                authors = ["".join(a.itertext()).strip() for a in el.findall("author")] or \
+                          ["".join(a.itertext()).strip() for a in el.findall("editor")]
+                # DBLP disambiguates homonyms as "Name 0001"
+                authors = [re.sub(r'\s+\d{4}$', '', a) for a in authors]
+                year = (el.findtext("year") or "").strip()
+                ees = [e.text or "" for e in el.findall("ee")]
+                doi = next((normalize_doi(e) for e in ees if "doi.org/" in e), "")
+                arx = next((m.group("id") for m in (_ARXIV_URL_RE.search(e) for e in ees) if m), "")
+                key = el.get("key", "")
+                yield {
+                    "title": title.rstrip("."),
+                    "authors": " and ".join(authors[:12]),
+                    "year": int(year) if year.isdigit() else None,
+                    "venue": (el.findtext("journal") or el.findtext("booktitle") or "").strip(),
+                    "doi": doi,
+                    "arxiv": arx,
+                    "url": f"https://dblp.org/rec/{key}" if key else (ees[0] if ees else ""),
+                    "source_id": key,
+                }
+                # detach finished records from <dblp> so memory stays flat
+                root.clear()
+
+def iter_openalex_jsonl(path: Path) -> Iterator[Dict[str, Any]]:
+    """Works from an OpenAlex snapshot (one work JSON object per line)."""
+    with _open_text(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                it = json.loads(line)
+            except Exception:
+                continue
+            auths = [(aa.get("author") or {}).get("display_name") for aa in it.get("authorships") or []]
+            arx = ""
+            for loc in it.get("locations") or []:
+                m = _ARXIV_URL_RE.search((loc.get("landing_page_url") or "") + " " + (loc.get("pdf_url") or ""))
+                if m:
+                    arx = m.group("id")
+                    break
+            src = ((it.get("primary_location") or {}).get("source") or {})
+            yield {
+                "title": it.get("title") or it.get("display_name") or "",
+                "authors": " and ".join([a for a in auths if a][:12]),
+                "year": it.get("publication_year"),
+                "venue": src.get("display_name") or "",
+                "doi": normalize_doi(it.get("doi") or ""),
+                "arxiv": arx,
+                "url": it.get("id") or "",
+                "source_id": it.get("id") or "",
+            }
+
+class LocalIndex:
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(str(self.path), check_same_thread=False)
+
+    @staticmethod
+    def build(path: Path, dblp_xml: Optional[Path] = None, openalex_jsonl: Optional[Path] = None,
+              batch: int = 20000) -> Dict[str, int]:
+        """Ingest dumps into a fresh index file (written aside, then renamed into place)."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(path.suffix + ".building")
+        if tmp.exists():
+            tmp.unlink()
+        db = sqlite3.connect(str(tmp))
+        db.executescript(
+            "PRAGMA journal_mode=OFF; PRAGMA synchronous=OFF;"
+            "CREATE TABLE works (id INTEGER PRIMARY KEY, source TEXT, source_id TEXT, title TEXT, authors TEXT,"
+            " year INTEGER, venue TEXT, doi TEXT, arxiv TEXT, url TEXT);"
+            "CREATE TABLE title_grams (gram TEXT NOT NULL, work_id INTEGER NOT NULL);"
+            "CREATE TABLE author_names (last TEXT NOT NULL, work_id INTEGER NOT NULL);"
+            "CREATE TABLE doi_map (doi TEXT NOT NULL, work_id INTEGER NOT NULL);"
+            "CREATE TABLE arxiv_map (arxiv TEXT NOT NULL, work_id INTEGER NOT NULL);")
+        counts = {"dblp": 0, "openalex": 0}
+        wid = 0
+        sources = []
+        if dblp_xml:
+            sources.append(("dblp", iter_dblp_xml(Path(dblp_xml))))
+        if openalex_jsonl:
+            sources.append(("openalex", iter_openalex_jsonl(Path(openalex_jsonl))))
+        for source, records in sources:
+            works, grams, names, dois, arxs = [], [], [], [], []
+            for rec in records:
+                if not rec["title"]:
+                    continue
+                wid += 1
+                counts[source] += 1
+                works.append((wid, source, rec["source_id"], rec["title"], rec["authors"], rec["year"],
+                               rec["venue"], rec["doi"], rec["arxiv"], rec["url"]))
+                grams += [(g, wid) for g in title_grams(rec["title"])]
+                names += [(n, wid) for n in last_names(rec["authors"])]
+                if rec["doi"]:
+                    dois.append((rec["doi"], wid))
+                if rec["arxiv"]:
+                    arxs.append((arxiv_base_id(rec["arxiv"]).lower(), wid))
+                if len(works) >= batch:
+                    LocalIndex._flush(db, works, grams, names, dois, arxs)
+                    works, grams, names, dois, arxs = [], [], [], [], []
+            LocalIndex._flush(db, works, grams, names, dois, arxs)
+        # build lookup indexes once, after the bulk load
+        db.executescript(
+            "CREATE INDEX title_grams_gram ON title_grams(gram, work_id);"
+            "CREATE INDEX author_names_last ON author_names(last, work_id);"
+            "CREATE INDEX doi_map_doi ON doi_map(doi);"
+            "CREATE INDEX arxiv_map_arxiv ON arxiv_map(arxiv);")
+        db.commit()
+        db.close()
+        os.replace(tmp, path)
+        return counts
+
+    @staticmethod
+    def _flush(db, works, grams, names, dois, arxs) -> None:
+        db.executemany("INSERT INTO works VALUES (?,?,?,?,?,?,?,?,?,?)", works)
+        db.executemany("INSERT INTO title_grams VALUES (?,?)", grams)
+        db.executemany("INSERT INTO author_names VALUES (?,?)", names)
+        db.executemany("INSERT INTO doi_map VALUES (?,?)", dois)
+        db.executemany("INSERT INTO arxiv_map VALUES (?,?)", arxs)
+        db.commit()
+
+    def _works(self, ids: List[int]) -> List[tuple]:
+        if not ids:
+            return []
+        q = "SELECT id, title, authors, year, venue, doi, arxiv, url FROM works WHERE id IN (%s)" % ",".join("?" * len(ids))
+        rows = {r[0]: r for r in self.db.execute(q, ids)}
+        return [rows[i] for i in ids if i in rows]
+
+    def _candidate(self, row: tuple, title: str, author: str, year: Optional[int]) -> Candidate:
+        _, w_title, w_auth, w_year, venue, doi, arx, url = row
+        mc = jaccard(title, w_title)*0.75 + author_overlap(author, w_auth)*0.25
+        if year and w_year and abs(int(year)-int(w_year))>2:
+            mc *= 0.85
+        ids = {"local": str(row[0])}
+        if doi:
+            ids["doi"] = doi
+        if arx:
+            ids["arxiv"] = arx
+        canonical = {"title": w_title, "authors": w_auth, "year": w_year, "venue": venue, "url": url}
+        return Candidate(source="local", match_conf=float(mc), canonical=canonical, ids=ids)
+
+    def _rarest(self, terms: List[str], table: str, col: str) -> Tuple[List[str], bool]:
+        """The MAX_QUERY_TERMS rarest of terms present in the index, skipping
+        stop terms (more than MAX_POSTINGS postings) unless nothing rarer is
+        there, and whether stop terms had to be used. Document frequencies are
+        counted only up to the cap."""
+        q = f"SELECT COUNT(*) FROM (SELECT 1 FROM {table} WHERE {col}=? LIMIT {MAX_POSTINGS + 1})"
+        df = {t: self.db.execute(q, (t,)).fetchone()[0] for t in terms}
+        found = sorted((t for t in terms if df[t]), key=lambda t: (df[t], t))
+        rare = [t for t in found if df[t] <= MAX_POSTINGS]
+        return (rare or found)[:MAX_QUERY_TERMS], bool(found) and not rare
+
+    @staticmethod
+    def _postings_sql(table: str, col: str, n: int) -> str:
+        # each term contributes at most MAX_POSTINGS rows
+        one = f"SELECT * FROM (SELECT work_id FROM {table} WHERE {col}=? LIMIT {MAX_POSTINGS})"
+        return " UNION ALL ".join([one] * n)
+
+    def lookup(self, title: str, author: str, year: Optional[int], doi: str = "", arxiv_id: str = "",
+               limit: int = 5) -> List[Candidate]:
+        """Exact DOI/arXiv hits first, then the best title-bigram matches (author/year fallback)."""
+        with self.lock:
+            ids: List[int] = []
+            if doi:
+                ids += [r[0] for r in self.db.execute("SELECT work_id FROM doi_map WHERE doi=?", (normalize_doi(doi),))]
+            if arxiv_id:
+                ids += [r[0] for r in self.db.execute("SELECT work_id FROM arxiv_map WHERE arxiv=?", (arxiv_base_id(arxiv_id).lower(),))]
+            grams, capped = self._rarest(title_grams(title), "title_grams", "gram")
+            if grams:
+                q = ("SELECT work_id, COUNT(*) AS c FROM (%s) GROUP BY work_id ORDER BY c DESC, work_id LIMIT %d"
+                     % (self._postings_sql("title_grams", "gram", len(grams)), MAX_TITLE_HITS))
+                ids += [r[0] for r in self.db.execute(q, grams)]
+            names = last_names(author)
+            # a title made only of stop bigrams saw truncated postings: ask the authors too
+            if (len(ids) < limit or capped) and names and year:
+                names, _ = self._rarest(names, "author_names", "last")
+                q = ("SELECT a.work_id FROM (%s) a JOIN works w ON w.id=a.work_id WHERE w.year BETWEEN ? AND ? "
+                     "GROUP BY a.work_id ORDER BY COUNT(*) DESC, a.work_id LIMIT %d"
+                     % (self._postings_sql("author_names", "last", len(names)), MAX_TITLE_HITS))
+                ids += [r[0] for r in self.db.execute(q, names + [int(year) - 1, int(year) + 1])]
+            rows = self._works(list(dict.fromkeys(ids)))
+        cands = [self._candidate(r, title, author, year) for r in rows]
+        exact = {c.ids["local"] for c in cands if (doi and normalize_doi(doi) == c.ids.get("doi"))
+                 or (arxiv_id and arxiv_base_id(arxiv_id).lower() == arxiv_base_id(c.ids.get("arxiv", "")).lower())}
+        cands.sort(key=lambda c: (c.ids["local"] not in exact, -c.match_conf))
+        return cands[:limit]
+
+    def stats(self) -> Dict[str, int]:
+        with self.lock:
+            out = {"works": self.db.execute("SELECT COUNT(*) FROM works").fetchone()[0]}
+            for src, n in self.db.execute("SELECT source, COUNT(*) FROM works GROUP BY source"):
+                out[src] = n
+        return out
+
+_index: Optional[LocalIndex] = None
+
+def configure(cfg: Dict[str, Any]) -> Optional[LocalIndex]:
+    """Open the index named by `local_index.path` (or the default), if it exists."""
+    global _index
+    li = cfg.get("local_index") or {}
+    _index = None
+    if not li.get("enabled", True):
+        return None
+    path = Path(os.path.expanduser(str(li["path"]))) if li.get("path") else default_index_path()
+    if path.exists():
+        _index = LocalIndex(path)
+    return _index
+
+def get_local_index() -> Optional[LocalIndex]:
+    return _index
+
+def resolve_local(title: str, author: str, year: Optional[int], doi: str = "", arxiv_id: str = "") -> List[Candidate]:
+    idx = _index
+    if idx is None:
+        return []
+    return idx.lookup(title, author, year, doi=doi, arxiv_id=arxiv_id)
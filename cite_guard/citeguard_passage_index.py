@@ -0,0 +1,182 @@
+from __future__ import annotations
+from collections import Counter
+from array import array
+from typing import Dict, Iterable, Iterator, List, Tuple
+import heapq, math, re
+
+from citeguard_similarity import Tokens, get_vocabulary, jaccard_ids
+
+try:
+    import numpy as np
+except Exception:
+    np = None
+
+# Per-reference inverted index over evidence passages, scored with BM25.
+# Passages are added once as the evidence is read; every claim citing the
+# reference queries the same index, and a query only walks the postings of
+# its own terms, so cost follows query length rather than document length
+# times the number of claims. Terms are integer ids from the run's
+# vocabulary and each passage keeps its distinct ids as a sorted array('I').
+
+PARA_SPLIT = re.compile(r'\n\s*\n')
+SENT_SPLIT = re.compile(r'(?<=[.!?])\s+')
+MAX_PASSAGE_WORDS = 120
+BATCH_CLAIMS = 64  # claims per matrix product; bounds the term x passage matrices
+
+def chunk_pages(pages: Iterable[str], max_words: int = MAX_PASSAGE_WORDS) -> Iterator[Tuple[int, str]]:
+    """(page number, passage) for pages joined by newlines: blank-line
+    paragraphs, with long paragraphs (PDF text often has no blank lines) packed
+    sentence by sentence into chunks of at most `max_words` words.
+
+    The last piece of each page is held back until the next page arrives,
+    since a paragraph can run across a page break; the page number is that of
+    the page whose arrival completed the passage.
+    """
+    def pack(para: str) -> Iterator[str]:
+        if len(para.split()) <= max_words:
+            yield para
+            return
+        cur: List[str] = []
+        n = 0
+        for sent in SENT_SPLIT.split(para):
+            w = len(sent.split())
+            if cur and n + w > max_words:
+                yield " ".join(cur)
+                cur, n = [], 0
+            cur.append(sent)
+            n += w
+        if cur:
+            yield " ".join(cur)
+
+    tail = None
+    n = -1
+    for n, page in enumerate(pages):
+        if not page:
+            continue
+        buf = page if tail is None else tail + "\n" + page
+        parts = PARA_SPLIT.split(buf)
+        tail = parts.pop()
+        for p in parts:
+            if p.strip():
+                for c in pack(p.strip()):
+                    yield n, c
+    if tail is not None and tail.strip():
+        for c in pack(tail.strip()):
+            yield n + 1, c
+
+class PassageIndex:
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.vocab = get_vocabulary()
+        self.passages: List[str] = []
+        self.token_ids: List[array] = []
+        self.lengths: List[int] = []
+        self.total_len = 0
+        self.postings: Dict[int, List[Tuple[int, int]]] = {}
+
+    def __len__(self) -> int:
+        return len(self.passages)
+
+    def add(self, passage: str) -> int:
+        # passages are unique per document; tokenize without the shared cache
+        ids = self.vocab.add_all(Tokens(passage).norm.split())
+        tfs = Counter(ids)
+        pid = len(self.passages)
+        self.passages.append(passage)
+        self.token_ids.append(array('I', sorted(tfs)))
+        self.lengths.append(len(ids))
+        self.total_len += len(ids)
+        for term, tf in tfs.items():
+            self.postings.setdefault(term, []).append((pid, tf))
+        return pid
+
+    def search(self, terms: Iterable[int], k: int = 3) -> List[Tuple[float, int]]:
+        """Top-k (bm25, passage id); ties go to the earlier passage."""
+        n = len(self.passages)
+        if not n:
+            return []
+        avgdl = self.total_len / n or 1.0
+        scores: Dict[int, float] = {}
+        for term in set(terms):
+            plist = self.postings.get(term)
+            if not plist:
+                continue
+            df = len(plist)
+            idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+            for pid, tf in plist:
+                norm = self.k1 * (1 - self.b + self.b * self.lengths[pid] / avgdl)
+                scores[pid] = scores.get(pid, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+        return [(s, pid) for pid, s in heapq.nsmallest(k, scores.items(), key=lambda x: (-x[1], x[0]))]
+
+    def best_match(self, claim_ids: array, k: int = 3) -> Tuple[float, str]:
+        """(jaccard, passage) of the best of the claim's top-k BM25 passages;
+        claim_ids is the claim's sorted id array (Tokens.ids)."""
+        best = (0.0, "")
+        if not claim_ids:
+            return best
+        for _, pid in self.search(claim_ids, k):
+            ov = jaccard_ids(claim_ids, self.token_ids[pid])
+            if ov > best[0]:
+                best = (ov, self.passages[pid])
+        return best
+
+    def best_matches(self, claims: List[array], k: int = 3) -> List[Tuple[float, str]]:
+        """best_match() for every claim. With numpy, claims are scored in batches:
+        one claim x term matrix against term x passage BM25 weights and term
+        presence gives all BM25 scores and token intersections in two products."""
+        if np is None or not self.passages:
+            return [self.best_match(ct, k) for ct in claims]
+        n = len(self.passages)
+        lengths = np.asarray(self.lengths, dtype=float)
+        norm = self.k1 * (1 - self.b + self.b * lengths / (self.total_len / n or 1.0))
+        # BM25 weights of each query term's postings, shared by all batches
+        cols: Dict[int, Tuple] = {}
+        for t in {t for ct in claims for t in ct if t in self.postings}:
+            plist = self.postings[t]
+            pids = np.fromiter((pid for pid, _ in plist), dtype=np.intp, count=len(plist))
+            tfs = np.fromiter((tf for _, tf in plist), dtype=float, count=len(plist))
+            idf = math.log(1 + (n - len(plist) + 0.5) / (len(plist) + 0.5))
+            cols[t] = (pids, idf * tfs * (self.k1 + 1) / (tfs + norm[pids]))
+        psize = np.array([len(ts) for ts in self.token_ids], dtype=float)
+        out: List[Tuple[float, str]] = []
+        for s in range(0, len(claims), BATCH_CLAIMS):
+            out += self._best_matches_np(claims[s:s + BATCH_CLAIMS], k, cols, psize)
+        return out
+
+    def _best_matches_np(self, claims: List[array], k: int, cols: Dict[int, Tuple], psize) -> List[Tuple[float, str]]:
+        # only terms some claim in the batch asks for become rows of W and B
+        terms = sorted({t for ct in claims for t in ct if t in cols})
+        if not terms:
+            return [(0.0, "") for _ in claims]
+        row = {t: j for j, t in enumerate(terms)}
+        n = len(self.passages)
+        Q = np.zeros((len(claims), len(terms)))
+        for i, ct in enumerate(claims):
+            Q[i, [row[t] for t in ct if t in row]] = 1.0
+        W = np.zeros((len(terms), n))
+        B = np.zeros((len(terms), n))
+        for j, t in enumerate(terms):
+            pids, w = cols[t]
+            W[j, pids] = w
+            B[j, pids] = 1.0
+        S = Q @ W
+        inter = Q @ B
+        csize = np.array([len(ct) for ct in claims], dtype=float)
+        J = inter / np.maximum(csize[:, None] + psize[None, :] - inter, 1.0)
+        # top k by BM25, ties to the earlier passage; a passage must share a term
+        if n > k:
+            cand = np.argpartition(-S, k - 1, axis=1)[:, :k]
+        else:
+            cand = np.tile(np.arange(n), (len(claims), 1))
+        out = []
+        for i in range(len(claims)):
+            # argpartition breaks ties at the k-th score arbitrarily; take the earliest passages
+            kth = max(S[i, cand[i]].min(), np.nextafter(0.0, 1.0))
+            pids = sorted(np.flatnonzero(S[i] >= kth), key=lambda p: (-S[i, p], p))[:k]
+            best = (0.0, "")
+            for pid in pids:
+                if J[i, pid] > best[0]:
+                    best = (float(J[i, pid]), self.passages[pid])
+            out.append(best)
+        return out
@@ -0,0 +1,118 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, List, Optional
+import random, threading, time
+
+@dataclass
+class HostStats:
+    requests: int = 0
+    throttled: int = 0
+    retried: int = 0
+    failed: int = 0
+    wait_sec: float = 0.0
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, up to `burst` banked."""
+    def __init__(self, rate: float, burst: float):
+        self.rate = max(0.001, float(rate))
+        self.burst = max(1.0, float(burst))
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Block until a token is available; returns seconds spent waiting."""
+        waited = 0.0
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if now >= self.paused_until and self.tokens >= 1.0:
+                    self.tokens -= 1.0
+                    return waited
+                delay = max(self.paused_until - now, (1.0 - self.tokens) / self.rate)
+            time.sleep(delay)
+            waited += delay
+
+    def pause(self, seconds: float) -> None:
+        # server asked us to back off: hold every caller for this host, and drain the bank
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.tokens = 0.0
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After is either delta-seconds or an HTTP-date."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except Exception:
+        return None
+
+def backoff_delay(attempt: int, base_sec: float, cap_sec: float) -> float:
+    # "full jitter" exponential backoff
+    return random.uniform(0.0, min(cap_sec, base_sec * (2 ** attempt)))
+
+class HostRateLimiter:
+    """One token bucket per host plus per-host throttling counters.
+
+    Config (config.yaml):
+
+        rate_limits:
+          default_per_sec: 5
+          burst: 5
+          hosts:
+            api.crossref.org: 10
+    """
+    def __init__(self, cfg: Optional[Dict[str, Any]] = None):
+        cfg = cfg or {}
+        self.default_rate = float(cfg.get("default_per_sec", 5))
+        self.burst = float(cfg.get("burst", 5))
+        self.host_rates = {str(h).lower(): float(r) for h, r in (cfg.get("hosts") or {}).items()}
+        self.buckets: Dict[str, TokenBucket] = {}
+        self.stats: Dict[str, HostStats] = {}
+        self.lock = threading.Lock()
+
+    def _bucket(self, host: str) -> TokenBucket:
+        with self.lock:
+            b = self.buckets.get(host)
+            if b is None:
+                rate = self.host_rates.get(host, self.default_rate)
+                b = self.buckets[host] = TokenBucket(rate, min(self.burst, max(1.0, rate)))
+                self.stats[host] = HostStats()
+            return b
+
+    def acquire(self, host: str) -> None:
+        waited = self._bucket(host).acquire()
+        with self.lock:
+            st = self.stats[host]
+            st.requests += 1
+            st.wait_sec += waited
+
+    def throttled(self, host: str, pause_sec: float) -> None:
+        self._bucket(host).pause(pause_sec)
+        with self.lock:
+            self.stats[host].throttled += 1
+
+    def retried(self, host: str) -> None:
+        with self.lock:
+            self.stats[host].retried += 1
+
+    def failed(self, host: str) -> None:
+        with self.lock:
+            self.stats[host].failed += 1
+
+    def report_lines(self) -> List[str]:
+        lines = []
+        for host in sorted(self.stats):
+            st = self.stats[host]
+            lines.append(f"- {host}: requests={st.requests} throttled={st.throttled} retried={st.retried} failed={st.failed} wait={st.wait_sec:.1f}s\n")
+        return lines
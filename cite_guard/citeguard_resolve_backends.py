@@ -1,13 +1,17 @@
 from __future__ import annotations
 from dataclasses import dataclass
-from typing import Dict, Any, List, Optional, Tuple
+from typing import Callable, Dict, Any, List, Optional, Tuple
+from urllib.parse import quote
 import re, json
 
 try:
-    import requests
+    import feedparser
 except Exception:
-    requests = None
+    feedparser = None
 
+from citeguard_breaker import BackendUnavailable, get_breaker
+from citeguard_http import get_client
+from citeguard_response_cache import get_response_cache
 from citeguard_similarity import jaccard, author_overlap
 
 @dataclass
@@ -17,127 +21,362 @@ class Candidate:
     canonical: Dict[str, Any]
     ids: Dict[str, str]
 
-def _req_json(url: str, params: dict, headers: dict, timeout: int) -> Optional[dict]:
-    if requests is None:
+NOT_FOUND_STATUS = (404, 410)
+
+def _req_text(backend: str, url: str, params: dict, headers: dict, timeout: int,
+              empty: Optional[Callable[[str], bool]] = None, cached: bool = True) -> Optional[str]:
+    """GET through the response cache and the backend's circuit breaker.
+
+    Returns the body, or None when the lookup found nothing (negative-cached
+    with a short TTL). Raises BackendUnavailable when the backend is down or
+    its breaker is open, so callers can tell an outage from a miss. Batch
+    lookups pass cached=False and cache each item of the answer themselves.
+    """
+    # consult the user-level response cache before touching the network
+    cache = get_response_cache() if cached else None
+    if cache is not None:
+        body = cache.get(backend, url, params)
+        if body is not None:
+            return body or None
+    breaker = get_breaker(backend)
+    breaker.before_call()
+    r = get_client().get(url, params=params, headers=headers, timeout=timeout)
+    if r is None or r.status_code == 429 or r.status_code >= 500:
+        breaker.failure()
+        raise BackendUnavailable(backend, "no response" if r is None else f"HTTP {r.status_code}")
+    breaker.success()
+    if r.status_code != 200:
+        if cache is not None and r.status_code in NOT_FOUND_STATUS:
+            cache.put(backend, url, params, "", negative=True)
+        return None
+    body = r.text
+    negative = bool(empty and empty(body))
+    if cache is not None:
+        cache.put(backend, url, params, body, negative=negative)
+    return None if negative else body
+
+def _req_json(backend: str, url: str, params: dict, headers: dict, timeout: int,
+              empty: Optional[Callable[[dict], bool]] = None, cached: bool = True) -> Optional[dict]:
+    def empty_body(body: str) -> bool:
+        try:
+            return bool(empty and empty(json.loads(body)))
+        except Exception:
+            return False
+    body = _req_text(backend, url, params, headers, timeout, empty_body, cached)
+    if body is None:
         return None
     try:
-        r = requests.get(url, params=params, headers=headers, timeout=timeout)
-        if r.status_code != 200:
-            return None
-        return r.json()
+        return json.loads(body)
     except Exception:
         return None
 
+def _cache_get(backend: str, url: str, params: dict) -> Optional[str]:
+    cache = get_response_cache()
+    return cache.get(backend, url, params) if cache is not None else None
+
+def _cache_put(backend: str, url: str, params: dict, body: str, negative: bool = False) -> None:
+    cache = get_response_cache()
+    if cache is not None:
+        cache.put(backend, url, params, body, negative=negative)
+
+def normalize_doi(doi: str) -> str:
+    """'https://doi.org/10.1/ABC' / 'doi:10.1/ABC' -> '10.1/abc' (DOIs are case-insensitive)."""
+    d = (doi or "").strip().lower()
+    d = re.sub(r'^(https?://(dx\.)?doi\.org/|doi:\s*)', '', d)
+    return d.strip()
+
+def _crossref_candidate(it: dict, title: str, author: str, year: Optional[int]) -> Candidate:
+    ct_title = (it.get("title") or [""])[0] if isinstance(it.get("title"), list) else (it.get("title") or "")
+    doi = it.get("DOI") or ""
+    issued = it.get("issued",{}).get("date-parts", [[None]])[0]
+    ct_year = issued[0] if issued and issued[0] else None
+    auths = it.get("author",[]) or []
+    auth_str = " and ".join([(a.get("family","") or "") for a in auths if a.get("family")][:12])
+    mc = jaccard(title, ct_title)*0.75 + author_overlap(author, auth_str)*0.25
+    if year and ct_year:
+        if abs(int(year)-int(ct_year))>2:
+            mc *= 0.85
+    canonical = {
+        "title": ct_title,
+        "authors": auth_str,
+        "year": ct_year,
+        "venue": (it.get("container-title") or [""])[0] if isinstance(it.get("container-title"), list) else (it.get("container-title") or ""),
+        "url": it.get("URL") or "",
+    }
+    ids={"doi": doi}
+    return Candidate(source="crossref", match_conf=float(mc), canonical=canonical, ids=ids)
+
 def resolve_crossref(title: str, author: str, year: Optional[int], timeout: int, ua: str) -> List[Candidate]:
     # Crossref works: /works?query.bibliographic=...&rows=5
     url = "https://api.crossref.org/works"
     q = title or ""
     headers={"User-Agent": ua}
     params={"query.bibliographic": q, "rows": 5}
-    data = _req_json(url, params, headers, timeout)
+    data = _req_json("crossref", url, params, headers, timeout,
+                     empty=lambda d: not (d.get("message") or {}).get("items"))
     out=[]
     if not data:
         return out
     items = data.get("message",{}).get("items",[]) or []
     for it in items:
-        ct_title = (it.get("title") or [""])[0] if isinstance(it.get("title"), list) else (it.get("title") or "")
-        doi = it.get("DOI") or ""
-        issued = it.get("issued",{}).get("date-parts", [[None]])[0]
-        ct_year = issued[0] if issued and issued[0] else None
-        auths = it.get("author",[]) or []
-        auth_str = " and ".join([(a.get("family","") or "") for a in auths if a.get("family")][:12])
-        mc = jaccard(title, ct_title)*0.75 + author_overlap(author, auth_str)*0.25
-        if year and ct_year:
-            if abs(int(year)-int(ct_year))>2:
-                mc *= 0.85
-        canonical = {
-            "title": ct_title,
-            "authors": auth_str,
-            "year": ct_year,
-            "venue": (it.get("container-title") or [""])[0] if isinstance(it.get("container-title"), list) else (it.get("container-title") or ""),
-            "url": it.get("URL") or "",
-        }
-        ids={"doi": doi}
-        out.append(Candidate(source="crossref", match_conf=float(mc), canonical=canonical, ids=ids))
+        out.append(_crossref_candidate(it, title, author, year))
     return out
 
+def resolve_crossref_doi(doi: str, title: str, author: str, year: Optional[int], timeout: int, ua: str) -> Optional[Candidate]:
+    # Crossref exact: /works/{doi}
+    d = normalize_doi(doi)
+    if not d:
+        return None
+    url = "https://api.crossref.org/works/" + quote(d, safe="/")
+    data = _req_json("crossref", url, {}, {"User-Agent": ua}, timeout)
+    it = (data or {}).get("message")
+    if not isinstance(it, dict):
+        return None
+    return _crossref_candidate(it, title, author, year)
+
+def _openalex_candidate(it: dict, title: str, author: str, year: Optional[int]) -> Candidate:
+    oa_title = it.get("title") or ""
+    oa_year = it.get("publication_year")
+    # authors list
+    auths=[]
+    for aa in it.get("authorships",[]) or []:
+        n = aa.get("author",{}).get("display_name")
+        if n:
+            auths.append(n)
+    auth_str = " and ".join(auths[:12])
+    mc = jaccard(title, oa_title)*0.75 + author_overlap(author, auth_str)*0.25
+    if year and oa_year:
+        if abs(int(year)-int(oa_year))>2:
+            mc *= 0.85
+    ids={}
+    doi = it.get("doi") or ""
+    if doi:
+        ids["doi"]=doi.replace("https://doi.org/","")
+    # arxiv?
+    for loc in it.get("locations",[]) or []:
+        url_l = (loc.get("landing_page_url") or "") + " " + (loc.get("pdf_url") or "")
+        m = re.search(r'arxiv\.org/(abs|pdf)/(?P<id>\d{4}\.\d{4,5})(v\d+)?', url_l)
+        if m:
+            ids["arxiv"]=m.group("id")
+            break
+    canonical = {
+        "title": oa_title,
+        "authors": auth_str,
+        "year": oa_year,
+        "venue": (it.get("primary_location") or {}).get("source",{}).get("display_name","") if it.get("primary_location") else "",
+        "url": (it.get("id") or ""),
+    }
+    ids["openalex"]=it.get("id","")
+    return Candidate(source="openalex", match_conf=float(mc), canonical=canonical, ids=ids)
+
 def resolve_openalex(title: str, author: str, year: Optional[int], timeout: int, ua: str) -> List[Candidate]:
     # OpenAlex: https://api.openalex.org/works?search=...&per-page=5
     url = "https://api.openalex.org/works"
     headers={"User-Agent": ua}
     params={"search": title or "", "per-page": 5}
-    data = _req_json(url, params, headers, timeout)
+    data = _req_json("openalex", url, params, headers, timeout, empty=lambda d: not d.get("results"))
     out=[]
     if not data:
         return out
     for it in data.get("results",[]) or []:
-        oa_title = it.get("title") or ""
-        oa_year = it.get("publication_year")
-        # authors list
-        auths=[]
-        for aa in it.get("authorships",[]) or []:
-            n = aa.get("author",{}).get("display_name")
-            if n:
-                auths.append(n)
-        auth_str = " and ".join(auths[:12])
-        mc = jaccard(title, oa_title)*0.75 + author_overlap(author, auth_str)*0.25
-        if year and oa_year:
-            if abs(int(year)-int(oa_year))>2:
-                mc *= 0.85
-        ids={}
-        doi = it.get("doi") or ""
-        if doi:
-            ids["doi"]=doi.replace("https://doi.org/","")
-        # arxiv?
-        for loc in it.get("locations",[]) or []:
-            url_l = (loc.get("landing_page_url") or "") + " " + (loc.get("pdf_url") or "")
-            m = re.search(r'arxiv\.org/(abs|pdf)/(?P<id>\d{4}\.\d{4,5})(v\d+)?', url_l)
-            if m:
-                ids["arxiv"]=m.group("id")
-                break
-        canonical = {
-            "title": oa_title,
-            "authors": auth_str,
-            "year": oa_year,
-            "venue": (it.get("primary_location") or {}).get("source",{}).get("display_name","") if it.get("primary_location") else "",
-            "url": (it.get("id") or ""),
-        }
-        ids["openalex"]=it.get("id","")
-        out.append(Candidate(source="openalex", match_conf=float(mc), canonical=canonical, ids=ids))
+        out.append(_openalex_candidate(it, title, author, year))
     return out
 
-def resolve_arxiv(arxiv_id: str, timeout: int, ua: str) -> Optional[Candidate]:
-    # arXiv API: http://export.arxiv.org/api/query?id_list=...
-    if requests is None:
-        return None
-    import feedparser
-    url = "http://export.arxiv.org/api/query"
+OPENALEX_DOI_BATCH_SIZE = 50
+
+def resolve_openalex_doi_batch(refs: Dict[str, dict], timeout: int, ua: str,
+                               batch_size: int = OPENALEX_DOI_BATCH_SIZE,
+                               unavailable: Optional[List[str]] = None) -> Dict[str, Candidate]:
+    """Bulk exact DOI lookup via OpenAlex filter=doi:a|b|c (up to 50 per call).
+
+    `refs` maps a caller key to {"doi", "title", "author", "year"}; the result
+    maps the same keys to candidates scored against each key's own bib
+    metadata. The response cache holds one entry per DOI (keyed as a
+    single-DOI filter), so only uncached DOIs are fetched; DOIs OpenAlex does
+    not know are negative-cached and absent from the result. Keys whose batch
+    hit an outage are appended to `unavailable`.
+    """
+    by_doi: Dict[str, List[str]] = {}
+    for key, ref in refs.items():
+        d = normalize_doi(ref.get("doi",""))
+        # "|" and "," are filter syntax; such DOIs go through the per-DOI path instead
+        if d and "|" not in d and "," not in d:
+            by_doi.setdefault(d, []).append(key)
+    out: Dict[str, Candidate] = {}
+    url = "https://api.openalex.org/works"
     headers={"User-Agent": ua}
-    try:
-        r = requests.get(url, params={"id_list": arxiv_id}, headers=headers, timeout=timeout)
-        if r.status_code != 200:
-            return None
-        feed = feedparser.parse(r.text)
-        if not feed.entries:
+    one = lambda d: {"filter": f"doi:{d}", "per-page": 1}
+
+    def emit(it: dict) -> None:
+        for key in by_doi.get(normalize_doi(it.get("doi") or ""), []):
+            ref = refs[key]
+            out[key] = _openalex_candidate(it, ref.get("title",""), ref.get("author",""), ref.get("year"))
+
+    misses = []
+    for d in sorted(by_doi):
+        body = _cache_get("openalex", url, one(d))
+        if body is None:
+            misses.append(d)
+        elif body:
+            try:
+                for it in json.loads(body).get("results") or []:
+                    emit(it)
+            except Exception:
+                continue
+    for i in range(0, len(misses), max(1, batch_size)):
+        chunk = misses[i:i+batch_size]
+        params = {"filter": "doi:" + "|".join(chunk), "per-page": len(chunk)}
+        try:
+            data = _req_json("openalex", url, params, headers, timeout, cached=False)
+        except BackendUnavailable:
+            if unavailable is not None:
+                unavailable += [key for d in chunk for key in by_doi[d]]
+            continue
+        if not isinstance(data, dict):
+            continue
+        works: Dict[str, dict] = {}
+        for it in data.get("results") or []:
+            emit(it)
+            works.setdefault(normalize_doi(it.get("doi") or ""), it)
+        for d in chunk:
+            if d in works:
+                _cache_put("openalex", url, one(d), json.dumps({"results": [works[d]]}))
+            else:
+                _cache_put("openalex", url, one(d), "", negative=True)
+    return out
+
+ARXIV_BATCH_SIZE = 50
+_ARXIV_ID_RE = re.compile(r'(?:arxiv:)?(?P<id>\d{4}\.\d{4,5}|[a-z\-]+(?:\.[a-z]{2})?/\d{7})(?:v\d+)?', re.IGNORECASE)
+_ATOM_ENTRY_RE = re.compile(r'<entry\b.*?</entry>', re.DOTALL)
+_ATOM_ID_RE = re.compile(r'<id>\s*(.*?)\s*</id>', re.DOTALL)
+
+def arxiv_base_id(arxiv_id: str) -> str:
+    """'arXiv:1706.03762v5' -> '1706.03762' (version and prefix dropped)."""
+    m = _ARXIV_ID_RE.search(arxiv_id or "")
+    return m.group("id") if m else (arxiv_id or "").strip()
+
+def is_arxiv_id(arxiv_id: str) -> bool:
+    """True for a bare new- or old-style arXiv id ('arXiv:' prefix and version allowed)."""
+    return _ARXIV_ID_RE.fullmatch((arxiv_id or "").strip()) is not None
+
+def _arxiv_candidate(e, arxiv_id: str) -> Candidate:
+    title = (e.get("title") or "").replace("\n"," ").strip()
+    authors = " and ".join([a.name for a in e.get("authors",[])][:12])
+    year = None
+    if e.get("published"):
+        year = int(e.published[:4])
+    canonical={"title": title, "authors": authors, "year": year, "venue": "arXiv", "url": e.get("link","")}
+    ids={"arxiv": arxiv_id}
+    return Candidate(source="arxiv", match_conf=1.0, canonical=canonical, ids=ids)
+
+def _arxiv_entries(body: str) -> Dict[str, Any]:
+    """{lowercased base id: parsed entry} of an Atom answer; API error entries are skipped."""
+    out: Dict[str, Any] = {}
+    for e in feedparser.parse(body).entries:
+        eid = e.get("id") or ""
+        if "api/errors" not in eid:
+            out.setdefault(arxiv_base_id(eid.rsplit("/abs/", 1)[-1]).lower(), e)
+    return out
+
+def _split_arxiv_feed(body: str) -> Optional[Dict[str, str]]:
+    """{lowercased base id: one-entry Atom feed} for each entry of an id_list
+    answer, or None if the API reported an error for the query."""
+    first = _ATOM_ENTRY_RE.search(body)
+    if first is None:
+        return {}
+    head = body[:first.start()]
+    out: Dict[str, str] = {}
+    for m in _ATOM_ENTRY_RE.finditer(body):
+        eid = _ATOM_ID_RE.search(m.group(0))
+        if eid is None or "api/errors" in eid.group(1):
             return None
-        e = feed.entries[0]
-        title = (e.get("title") or "").replace("\n"," ").strip()
-        authors = " and ".join([a.name for a in e.get("authors",[])][:12])
-        year = None
-        if e.get("published"):
-            year = int(e.published[:4])
-        canonical={"title": title, "authors": authors, "year": year, "venue": "arXiv", "url": e.get("link","")}
-        ids={"arxiv": arxiv_id}
-        return Candidate(source="arxiv", match_conf=1.0, canonical=canonical, ids=ids)
-    except Exception:
-        return None
+        out.setdefault(arxiv_base_id(eid.group(1).rsplit("/abs/", 1)[-1]).lower(), head + m.group(0) + "\n</feed>\n")
+    return out
+
+def resolve_arxiv_batch(arxiv_ids: List[str], timeout: int, ua: str, batch_size: int = ARXIV_BATCH_SIZE,
+                        unavailable: Optional[List[str]] = None) -> Dict[str, Candidate]:
+    """Resolve many arXiv ids with comma-separated id_list queries, one Atom parse per chunk.
+
+    The response cache holds one entry per id (keyed as a single-id query),
+    so only ids missing from it are fetched, and an id the API does not know
+    is negative-cached on its own. Returns {requested id: Candidate}; unknown
+    and malformed ids (pubmed/hal eprints...) are absent. A chunk the API
+    rejects is split in half and retried until the bad id is alone. Ids whose
+    chunk hit an outage are appended to `unavailable`.
+    """
+    out: Dict[str, Candidate] = {}
+    if feedparser is None:
+        return out
+    by_base: Dict[str, List[str]] = {}
+    query_ids: Dict[str, str] = {}
+    for aid in arxiv_ids:
+        # one malformed id turns the whole id_list answer into an error feed
+        if is_arxiv_id(aid):
+            base = arxiv_base_id(aid)
+            by_base.setdefault(base.lower(), []).append(aid)
+            query_ids.setdefault(base.lower(), base)
+    url = "http://export.arxiv.org/api/query"
+    headers={"User-Agent": ua}
+    one = lambda b: {"id_list": query_ids[b], "max_results": 1}
+
+    def emit(entries: Dict[str, Any]) -> None:
+        for b, e in entries.items():
+            for aid in by_base.get(b, []):
+                out[aid] = _arxiv_candidate(e, aid)
+
+    misses = []
+    for b in sorted(by_base):
+        body = _cache_get("arxiv", url, one(b))
+        if body is None:
+            misses.append(b)
+        elif body:
+            try:
+                emit(_arxiv_entries(body))
+            except Exception:
+                continue
+    step = max(1, batch_size)
+    chunks = [misses[i:i+step] for i in range(0, len(misses), step)]
+    while chunks:
+        chunk = chunks.pop(0)
+        # without max_results the API caps the answer at 10 entries
+        params = {"id_list": ",".join(query_ids[b] for b in chunk), "max_results": len(chunk)}
+        try:
+            body = _req_text("arxiv", url, params, headers, timeout, cached=False)
+        except BackendUnavailable:
+            if unavailable is not None:
+                unavailable += [aid for b in chunk for aid in by_base[b]]
+            continue
+        try:
+            parts = None if body is None else _split_arxiv_feed(body)
+            if parts is not None:
+                emit(_arxiv_entries(body))
+        except Exception:
+            continue
+        if parts is None:
+            # rejected query (error feed or 4xx): bisect so only the offending id is lost
+            if len(chunk) > 1:
+                chunks[:0] = [chunk[:len(chunk) // 2], chunk[len(chunk) // 2:]]
+            else:
+                _cache_put("arxiv", url, one(chunk[0]), "", negative=True)
+            continue
+        for b in chunk:
+            if b in parts:
+                _cache_put("arxiv", url, one(b), parts[b])
+            else:
+                _cache_put("arxiv", url, one(b), "", negative=True)
+    return out
+
+def resolve_arxiv(arxiv_id: str, timeout: int, ua: str) -> Optional[Candidate]:
+    # arXiv API: http://export.arxiv.org/api/query?id_list=...
+    return resolve_arxiv_batch([arxiv_id], timeout, ua).get(arxiv_id)
 
 def resolve_dblp(title: str, timeout: int, ua: str) -> List[Candidate]:
     # DBLP API: https://dblp.org/search/publ/api?q=...&format=json&h=5
     url = "https://dblp.org/search/publ/api"
     headers={"User-Agent": ua}
     params={"q": title or "", "format":"json", "h": 5}
-    data = _req_json(url, params, headers, timeout)
+    data = _req_json("dblp", url, params, headers, timeout,
+                     empty=lambda d: not ((d.get("result") or {}).get("hits") or {}).get("hit"))
     out=[]
     if not data:
         return out
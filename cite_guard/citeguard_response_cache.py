@@ -0,0 +1,172 @@
+from __future__ import annotations
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import atexit, hashlib, json, os, re, sqlite3, threading, time
+
+# User-level on-disk cache of backend API responses (OpenAlex, Crossref, DBLP,
+# arXiv), shared by every paper's out/ directory. One SQLite file; entries
+# expire per backend TTL and the least recently used ones are evicted once
+# the file grows past its size cap. Lookups that found nothing (404, empty
+# result sets) are kept as negative entries with a much shorter TTL; they
+# read back as "".
+
+ACCESS_FLUSH_EVERY = 256  # hits whose LRU timestamps are written in one transaction
+
+DEFAULT_TTL_DAYS = {"openalex": 30, "crossref": 30, "dblp": 30, "arxiv": 90}
+
+def default_cache_path() -> Path:
+    base = os.environ.get("XDG_CACHE_HOME") or str(Path.home() / ".cache")
+    return Path(base) / "cite-guard" / "responses.sqlite"
+
+def normalize_query(backend: str, url: str, params: Optional[dict]) -> str:
+    """Canonical text for a request: backend, URL and sorted, case/whitespace-folded params."""
+    items = sorted((str(k), re.sub(r'\s+', ' ', str(v)).strip().lower()) for k, v in (params or {}).items())
+    return json.dumps([backend, url.rstrip("/").lower(), items], separators=(",", ":"))
+
+class ResponseCache:
+    def __init__(self, path: Path, ttl_days: Optional[Dict[str, float]] = None, max_bytes: int = 512 * 2**20,
+                 default_ttl_days: float = 30, negative_ttl_hours: float = 6):
+        self.path = Path(path)
+        self.ttl_sec = {b: float(d) * 86400 for b, d in {**DEFAULT_TTL_DAYS, **(ttl_days or {})}.items()}
+        self.default_ttl_sec = float(default_ttl_days) * 86400
+        self.max_bytes = int(max_bytes)
+        self.negative_ttl_sec = float(negative_ttl_hours) * 3600
+        self.stats: Dict[str, Dict[str, int]] = {}
+        self.lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, backend TEXT NOT NULL, created REAL NOT NULL,"
+            " accessed REAL NOT NULL, size INTEGER NOT NULL, body TEXT NOT NULL)")
+        self.db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses(accessed)")
+        if "negative" not in [r[1] for r in self.db.execute("PRAGMA table_info(responses)")]:
+            self.db.execute("ALTER TABLE responses ADD COLUMN negative INTEGER NOT NULL DEFAULT 0")
+        self.db.commit()
+        # running size total, re-summed only when it says eviction is due
+        self.total = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        # key -> last access time of hits not yet written back
+        self.accessed: Dict[str, float] = {}
+        atexit.register(self.flush)
+
+    def _key(self, backend: str, url: str, params: Optional[dict]) -> str:
+        return hashlib.sha256(normalize_query(backend, url, params).encode("utf-8")).hexdigest()
+
+    def _count(self, backend: str, what: str) -> None:
+        st = self.stats.setdefault(backend, {"hits": 0, "negative_hits": 0, "misses": 0, "stores": 0, "expired": 0, "evicted": 0})
+        st[what] += 1
+
+    def get(self, backend: str, url: str, params: Optional[dict] = None) -> Optional[str]:
+        key = self._key(backend, url, params)
+        now = time.time()
+        with self.lock:
+            row = self.db.execute("SELECT created, body, negative, size FROM responses WHERE key=?", (key,)).fetchone()
+            if row is None:
+                self._count(backend, "misses")
+                return None
+            ttl = self.negative_ttl_sec if row[2] else self.ttl_sec.get(backend, self.default_ttl_sec)
+            if now - row[0] > ttl:
+                self.db.execute("DELETE FROM responses WHERE key=?", (key,))
+                self.db.commit()
+                self.total -= row[3]
+                self.accessed.pop(key, None)
+                self._count(backend, "expired")
+                self._count(backend, "misses")
+                return None
+            # a hit only bumps its LRU timestamp in memory; written back in batches
+            self.accessed[key] = now
+            if len(self.accessed) >= ACCESS_FLUSH_EVERY:
+                self._write_accessed()
+                self.db.commit()
+            self._count(backend, "negative_hits" if row[2] else "hits")
+            return "" if row[2] else row[1]
+
+    def put(self, backend: str, url: str, params: Optional[dict], body: str, negative: bool = False) -> None:
+        key = self._key(backend, url, params)
+        now = time.time()
+        if negative:
+            body = ""
+        size = len(body.encode("utf-8"))
+        with self.lock:
+            old = self.db.execute("SELECT size FROM responses WHERE key=?", (key,)).fetchone()
+            self.db.execute("INSERT OR REPLACE INTO responses(key, backend, created, accessed, size, body, negative) VALUES (?,?,?,?,?,?,?)",
+                            (key, backend, now, now, size, body, 1 if negative else 0))
+            self.accessed.pop(key, None)
+            self.total += size - (old[0] if old else 0)
+            self._count(backend, "stores")
+            if self.total > self.max_bytes:
+                self._evict()
+            self.db.commit()
+
+    def _write_accessed(self) -> None:
+        if self.accessed:
+            self.db.executemany("UPDATE responses SET accessed=? WHERE key=?", [(t, k) for k, t in self.accessed.items()])
+            self.accessed.clear()
+
+    def flush(self) -> None:
+        """Write back pending LRU timestamps."""
+        with self.lock:
+            try:
+                self._write_accessed()
+                self.db.commit()
+            except sqlite3.ProgrammingError:
+                # already closed
+                pass
+
+    def _evict(self) -> None:
+        # other processes share the file: re-sum before deciding, then order by up-to-date access times
+        self._write_accessed()
+        total = self.total = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # drop least recently used entries until back under 90% of the cap
+        target = int(self.max_bytes * 0.9)
+        for key, backend, size in self.db.execute("SELECT key, backend, size FROM responses ORDER BY accessed").fetchall():
+            if total <= target:
+                break
+            self.db.execute("DELETE FROM responses WHERE key=?", (key,))
+            self._count(backend, "evicted")
+            total -= size
+        self.total = total
+
+    def report_lines(self) -> List[str]:
+        lines = []
+        for b in sorted(self.stats):
+            st = self.stats[b]
+            lines.append(f"- {b}: hits={st['hits']} negative_hits={st['negative_hits']} misses={st['misses']} stores={st['stores']} expired={st['expired']} evicted={st['evicted']}\n")
+        return lines
+
+    def close(self) -> None:
+        self.flush()
+        atexit.unregister(self.flush)
+        with self.lock:
+            self.db.close()
+
+_cache: Optional[ResponseCache] = None
+
+def configure(cfg: Dict[str, Any]) -> Optional[ResponseCache]:
+    """(Re)open the shared response cache from the `response_cache` config block."""
+    global _cache
+    rc = cfg.get("response_cache") or {}
+    if _cache is not None:
+        _cache.close()
+        _cache = None
+    if not rc.get("enabled", True):
+        return None
+    path = Path(os.path.expanduser(str(rc["path"]))) if rc.get("path") else default_cache_path()
+    try:
+        _cache = ResponseCache(path, ttl_days=rc.get("ttl_days") or {}, max_bytes=int(float(rc.get("max_mb", 512)) * 2**20),
+                               negative_ttl_hours=float(rc.get("negative_ttl_hours", 6)))
+    except Exception:
+        # unwritable cache dir or locked file: run uncached rather than fail the stage
+        _cache = None
+    return _cache
+
+def get_response_cache() -> Optional[ResponseCache]:
+    return _cache
+
+def stats_report_lines() -> List[str]:
+    lines = _cache.report_lines() if _cache is not None else []
+    return (["\n## Response cache\n"] + lines) if lines else []
@@ -1,36 +1,198 @@
 from __future__ import annotations
-import re, math
-from typing import Dict, List, Tuple
+import re, math, sys, threading
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Tuple, Union
+
+_NON_ALNUM = re.compile(r'[^a-z0-9\s]+')
+_SPACES = re.compile(r'\s+')
+_AUTHOR_SPLIT = re.compile(r'\band\b|,|;')
+_NAME_SPLIT = re.compile(r'\s+and\s+|;', re.IGNORECASE)
+
+# Strings longer than this (evidence passages, whole pages) are tokenized
+# without caching; titles, author lists and claims are what repeats.
+MAX_CACHED_CHARS = 2048
+
+class Vocabulary:
+    """Per-run token -> integer id map; ids are dense and assigned on first sight."""
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def get(self, tok: str) -> Optional[int]:
+        return self.ids.get(tok)
+
+    def add_all(self, toks: Iterable[str]) -> List[int]:
+        ids = self.ids
+        out = []
+        for t in toks:
+            i = ids.get(t)
+            if i is None:
+                with self.lock:
+                    i = ids.setdefault(t, len(ids))
+            out.append(i)
+        return out
+
+    def sorted_ids(self, toks: Iterable[str]) -> array:
+        """Distinct ids of toks as a sorted array('I')."""
+        return array('I', sorted(set(self.add_all(toks))))
+
+_vocab = Vocabulary()
+
+def get_vocabulary() -> Vocabulary:
+    return _vocab
+
+def overlap_count(a: array, b: array) -> int:
+    """|a & b| for sorted id arrays, without building sets: each id of the
+    shorter array is located in the longer one by bisection, resuming from
+    the previous position."""
+    if len(a) > len(b):
+        a, b = b, a
+    n = lo = 0
+    hi = len(b)
+    for x in a:
+        lo = bisect_left(b, x, lo)
+        if lo == hi:
+            break
+        if b[lo] == x:
+            n += 1
+    return n
+
+def jaccard_ids(a: array, b: array) -> float:
+    if not a or not b:
+        return 0.0
+    inter = overlap_count(a, b)
+    return inter / (len(a) + len(b) - inter)
+
+def _normalize(s: str) -> str:
+    return _SPACES.sub(' ', _NON_ALNUM.sub(' ', (s or "").lower())).strip()
+
+class Tokens:
+    """A string tokenized once: normalized text, token set and (on first use)
+    author last names. Get one from tokenize() and compare it many times."""
+    __slots__ = ("text", "norm", "tokens", "_authors", "_ids", "_vocab")
+
+    def __init__(self, text: str):
+        self.text = text or ""
+        self.norm = _normalize(self.text)
+        self.tokens: FrozenSet[str] = frozenset(self.norm.split())
+        self._authors: Optional[FrozenSet[str]] = None
+        self._ids: Optional[array] = None
+        self._vocab: Optional[Vocabulary] = None
+
+    @property
+    def ids(self) -> array:
+        """Token ids in the current run's vocabulary, as a sorted array('I')."""
+        if self._vocab is not _vocab:
+            self._ids = _vocab.sorted_ids(self.tokens)
+            self._vocab = _vocab
+        return self._ids
+
+    @property
+    def authors(self) -> FrozenSet[str]:
+        """Last-name tokens as author_overlap compares them."""
+        if self._authors is None:
+            names = set()
+            for p in _AUTHOR_SPLIT.split(self.norm):
+                toks = p.split()
+                if toks:
+                    names.add(toks[-1])
+            self._authors = frozenset(names)
+        return self._authors
+
+    def size(self) -> int:
+        """Approximate bytes held, for the cache budget."""
+        return sys.getsizeof(self.text) + sys.getsizeof(self.norm) + sys.getsizeof(self.tokens) + sum(sys.getsizeof(t) for t in self.tokens)
+
+class TokenCache:
+    """Thread-safe LRU of Tokens bounded by entry count and approximate bytes."""
+    def __init__(self, max_entries: int = 50000, max_bytes: int = 64 << 20):
+        self.max_entries = max(0, max_entries)
+        self.max_bytes = max(0, max_bytes)
+        self.entries: "OrderedDict[str, Tuple[Tokens, int]]" = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, s: str) -> Tokens:
+        s = s or ""
+        if len(s) > MAX_CACHED_CHARS or not self.max_entries:
+            return Tokens(s)
+        with self.lock:
+            hit = self.entries.get(s)
+            if hit is not None:
+                self.entries.move_to_end(s)
+                self.hits += 1
+                return hit[0]
+            self.misses += 1
+        tok = Tokens(s)
+        size = tok.size()
+        with self.lock:
+            if s not in self.entries:
+                self.entries[s] = (tok, size)
+                self.bytes += size
+                while self.entries and (len(self.entries) > self.max_entries or self.bytes > self.max_bytes):
+                    _, (_, sz) = self.entries.popitem(last=False)
+                    self.bytes -= sz
+        return tok
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+            self.bytes = self.hits = self.misses = 0
+
+_cache = TokenCache()
+
+def configure(cfg: Dict[str, Any]) -> TokenCache:
+    """Resize the shared token cache from the `similarity_cache` config block
+    and start a fresh token vocabulary."""
+    global _cache, _vocab
+    _vocab = Vocabulary()
+    sc = cfg.get("similarity_cache") or {}
+    _cache = TokenCache(int(sc.get("max_entries", 50000)), int(float(sc.get("max_mb", 64)) * (1 << 20)))
+    return _cache
+
+def get_token_cache() -> TokenCache:
+    return _cache
+
+TextOrTokens = Union[str, Tokens]
+
+def tokenize(s: TextOrTokens) -> Tokens:
+    return s if isinstance(s, Tokens) else _cache.get(s)
 
 def normalize(s: str) -> str:
-    s = (s or "").lower()
-    s = re.sub(r'[^a-z0-9\s]+',' ', s)
-    s = re.sub(r'\s+',' ', s).strip()
-    return s
+    return tokenize(s).norm
 
-def token_set(s: str) -> set[str]:
-    return set(normalize(s).split())
+def token_set(s: TextOrTokens) -> set[str]:
+    return set(tokenize(s).tokens)
 
-def jaccard(a: str, b: str) -> float:
-    A = token_set(a)
-    B = token_set(b)
+def _set_jaccard(A: FrozenSet[str], B: FrozenSet[str]) -> float:
     if not A or not B:
         return 0.0
-    return len(A & B) / len(A | B)
+    inter = len(A & B)
+    return inter / (len(A) + len(B) - inter)
+
+def jaccard(a: TextOrTokens, b: TextOrTokens) -> float:
+    return _set_jaccard(tokenize(a).tokens, tokenize(b).tokens)
 
-def author_overlap(a: str, b: str) -> float:
+def last_names(authors: str) -> List[str]:
+    """Last names from 'A Smith and B Jones' or 'Smith, A and Jones, B'."""
+    out = []
+    for part in _NAME_SPLIT.split(authors or ""):
+        part = part.strip()
+        if not part:
+            continue
+        name = part.split(",", 1)[0] if "," in part else part
+        toks = normalize(name).split()
+        if toks:
+            out.append(toks[-1])
+    return list(dict.fromkeys(out))
+
+def author_overlap(a: TextOrTokens, b: TextOrTokens) -> float:
     # crude: overlap of last-name tokens
-    def last_names(s: str) -> set[str]:
-        s = normalize(s)
-        parts = [p.strip() for p in re.split(r'\band\b|,|;', s) if p.strip()]
-        names=set()
-        for p in parts:
-            toks=p.split()
-            if toks:
-                names.add(toks[-1])
-        return names
-    A=last_names(a)
-    B=last_names(b)
-    if not A or not B:
-        return 0.0
-    return len(A & B) / len(A | B)
+    return _set_jaccard(tokenize(a).authors, tokenize(b).authors)
@@ -0,0 +1,55 @@
+from __future__ import annotations
+from pathlib import Path
+import time
+from citeguard_context import RunContext
+
+PIPELINE = ["init","audit","resolve","ground","venue","ml","review_critiques"]
+EXTRA_STAGES = ["export"]
+
+def _runner(stage: str):
+    if stage == "init":
+        from citeguard_stage_init import run_init
+        return run_init
+    if stage == "audit":
+        from citeguard_stage_audit import run_audit
+        return run_audit
+    if stage == "resolve":
+        from citeguard_stage_resolve import run_resolve
+        return run_resolve
+    if stage == "ground":
+        from citeguard_stage_ground import run_ground
+        return run_ground
+    if stage == "venue":
+        from citeguard_stage_venue import run_venue
+        return run_venue
+    if stage == "ml":
+        from citeguard_stage_ml import run_ml
+        return run_ml
+    if stage == "review_critiques":
+        from citeguard_stage_review_critiques import run_review_critiques
+        return run_review_critiques
+    if stage == "export":
+        from citeguard_stage_export import run_export
+        return run_export
+    raise ValueError(f"Unknown stage: {stage}")
+
+def run_all(tex_path: Path, bib_path: Path, out_dir: Path, args) -> int:
+    """Run the config's `stages` (default: the whole pipeline) in one process
+    over a shared RunContext; outputs are written once at the end, or after
+    each stage with --checkpoint."""
+    ctx = RunContext(tex_path, bib_path, out_dir, args, checkpoint=bool(getattr(args, "checkpoint", False)))
+    stages = list(ctx.config().get("stages") or PIPELINE)
+    unknown = [s for s in stages if s not in PIPELINE + EXTRA_STAGES]
+    if unknown:
+        print(f"[all] unknown stages in config `stages`: {', '.join(unknown)}")
+        return 2
+    t0 = time.monotonic()
+    for st in stages:
+        rc = _runner(st)(tex_path, bib_path, out_dir, args, ctx)
+        if rc:
+            ctx.flush()
+            print(f"[all] stopped: {st} returned {rc}")
+            return rc
+    ctx.flush()
+    print(f"[all] ran {len(stages)} stages in {time.monotonic() - t0:.1f}s; wrote outputs to {out_dir}")
+    return 0
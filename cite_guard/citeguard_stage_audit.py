@@ -1,31 +1,31 @@
 from __future__ import annotations
 from pathlib import Path
-from citeguard_csv import load_rows, filter_rows, update_row, write_rows_atomic
-from citeguard_bib_parse import parse_bib_file
-from citeguard_tex_parse import parse_tex_project
+from typing import Optional
+from citeguard_context import RunContext
+from citeguard_dedup import find_duplicate_clusters
 
 PLACEHOLDER_PAT = ("tbd", "todo", "unknown", "n/a", "na", "xxx")
 
-def run_audit(tex_path: Path, bib_path: Path, out_dir: Path, args) -> int:
-    csv_path = out_dir/"audit_references.csv"
-    rows, cols = load_rows(csv_path)
-    target_rows = filter_rows(rows, args.only)
+def _int(x):
+    try:
+        return int(x)
+    except Exception:
+        return None
+
+def run_audit(tex_path: Path, bib_path: Path, out_dir: Path, args, ctx: Optional[RunContext] = None) -> int:
+    ctx = ctx or RunContext(tex_path, bib_path, out_dir, args)
+    rows = ctx.table()
+    rows.ensure_columns(["audit_duplicate_cluster"], after="audit_remediation")
+    target_rows = rows.filter(args.only)
 
-    entries = {e.key: e for e in parse_bib_file(bib_path)}
+    entries = ctx.bib_entries()
     try:
-        citation_uses, usage_count, spans = parse_tex_project(tex_path)
+        citation_uses, usage_count, spans = ctx.tex()
     except Exception:
         usage_count = {}
 
     # load penalties from config
-    cfg={}
-    cfg_path = Path(args.config)
-    if cfg_path.exists():
-        try:
-            from citeguard_yaml import load_yaml
-            cfg = load_yaml(cfg_path.read_text(encoding="utf-8"))
-        except Exception:
-            cfg={}
+    cfg = ctx.config()
     pen = cfg.get("audit_penalties") or {}
     p_title = int(pen.get("missing_title",30))
     p_auth  = int(pen.get("missing_authors",30))
@@ -34,14 +34,33 @@ def run_audit(tex_path: Path, bib_path: Path, out_dir: Path, args) -> int:
     p_malf  = int(pen.get("malformed_bibtex",10))
     p_unused = int(pen.get("unused_reference",10))
     p_placeholder = int(pen.get("placeholder_field",10))
+    p_dup = int(pen.get("duplicate_entry",10))
 
     report = ["# stage_audit_report\n\n"]
 
+    # near-duplicate clusters over the whole bib file, not just --only rows
+    dcfg = cfg.get("audit_duplicates") or {}
+    clusters = []
+    if dcfg.get("enabled", True):
+        dup_input = []
+        for e in entries.values():
+            f = {k.lower(): (v or "") for k,v in (e.fields or {}).items()}
+            if f.get("title"):
+                dup_input.append((e.key, f["title"], f.get("author",""), _int(f.get("year")), f.get("doi",""),
+                                  f.get("journal") or f.get("booktitle","")))
+        clusters = find_duplicate_clusters(dup_input, threshold=float(dcfg.get("threshold", 0.7)),
+                                           num_perm=int(dcfg.get("num_perm", 64)), bands=int(dcfg.get("bands", 16)),
+                                           max_bucket=int(dcfg.get("max_bucket", 200)))
+    cluster_of = {}
+    for i, members in enumerate(clusters, 1):
+        for k in members:
+            cluster_of[k] = (f"dup{i}", members)
+
     for r in target_rows:
         key = r["bib_key"]
         e = entries.get(key)
         if not e:
-            update_row(rows, key, {
+            rows.update(key, {
                 "audit_quality":"0","audit_confidence":"30",
                 "audit_remediation":"Bib entry missing from current bib file; rerun init or fix --bib path."
             })
@@ -68,19 +87,28 @@ def run_audit(tex_path: Path, bib_path: Path, out_dir: Path, args) -> int:
         # unused penalty
         if usage_count and usage_count.get(key,0)==0:
             q -= p_unused; rem.append("remove unused or cite in text")
+        cluster_id, members = cluster_of.get(key, ("", []))
+        if cluster_id:
+            q -= p_dup; rem.append("merge near-duplicate of " + ", ".join(k for k in members if k != key))
         q = max(0, min(100, q))
         # confidence heuristic
         c = 95 if q >= 70 else 80
         remediation = "Fix: " + (", ".join(dict.fromkeys(rem)) if rem else "no changes needed")
-        update_row(rows, key, {
+        rows.update(key, {
             "audit_quality": str(q),
             "audit_confidence": str(c),
-            "audit_remediation": remediation
+            "audit_remediation": remediation,
+            "audit_duplicate_cluster": cluster_id
         })
         if q < 80:
             report.append(f"- {key}: Q={q} C={c} — {remediation}\n")
 
-    (out_dir/"stage_audit_report.md").write_text("".join(report), encoding="utf-8")
-    write_rows_atomic(csv_path, rows, cols)
+    if clusters:
+        report.append(f"\n## Near-duplicate entries ({len(clusters)} clusters)\n")
+        for i, members in enumerate(clusters, 1):
+            report.append(f"- dup{i}: {', '.join(members)}\n")
+
+    ctx.write_text("stage_audit_report.md", "".join(report))
+    ctx.end_stage()
     print(f"[audit] updated {len(target_rows)} references; wrote stage_audit_report.md")
     return 0
@@ -0,0 +1,18 @@
+from __future__ import annotations
+from pathlib import Path
+from typing import Optional
+from citeguard_context import RunContext
+
+def run_export(tex_path: Path, bib_path: Path, out_dir: Path, args, ctx: Optional[RunContext] = None) -> int:
+    ctx = ctx or RunContext(tex_path, bib_path, out_dir, args)
+    if ctx.store_backend != "sqlite":
+        print(f"[export] working store is {ctx.csv_path} already; nothing to export")
+        return 0
+    if not ctx.store_path.exists():
+        print(f"[export] no working store at {ctx.store_path}; run init first")
+        return 2
+    store = ctx.table()
+    n = store.export_csv(ctx.csv_path)
+    store.export_csv(out_dir/"review_critiques.csv", ranked=True)
+    print(f"[export] wrote {ctx.csv_path} and {out_dir/'review_critiques.csv'} ({n} references) from {ctx.store_path}")
+    return 0
@@ -1,31 +1,37 @@
 from __future__ import annotations
 from pathlib import Path
-import json, re
-from typing import Dict, List, Tuple
-from citeguard_csv import load_rows, filter_rows, update_row, write_rows_atomic
-from citeguard_tex_parse import parse_tex_project
-from citeguard_bib_parse import parse_bib_file
-from citeguard_yaml import load_yaml
+import json, multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, Iterable, List, Optional, Tuple
+from citeguard_context import RunContext
 from citeguard_claims import extract_claims_from_citations, extract_uncited_high_priority_sentences
-from citeguard_similarity import normalize, token_set, jaccard
-from citeguard_evidence import fetch_url, discover_linked_artifacts, extract_text_from_artifact
-
-def _safe_mkdir(p: Path):
-    p.mkdir(parents=True, exist_ok=True)
-
-def _top_snippets(claim: str, text: str, k: int = 3) -> List[str]:
-    # pick top k paragraphs by jaccard overlap with claim tokens
-    claim_toks = token_set(claim)
-    paras = [p.strip() for p in re.split(r'\n\s*\n', text) if p.strip()]
-    scored=[]
-    for p in paras[:200]:
-        ptoks = token_set(p)
-        if not ptoks:
-            continue
-        overlap = len(claim_toks & ptoks) / max(1, len(claim_toks))
-        scored.append((overlap, p))
-    scored.sort(reverse=True, key=lambda x: x[0])
-    return [p for _,p in scored[:k]]
+from citeguard_similarity import configure as configure_similarity, tokenize
+from citeguard_passage_index import PassageIndex, chunk_pages
+from citeguard_http import configure as configure_http, stats_report_lines as http_stats_lines
+from citeguard_evidence_store import configure as configure_evidence_store, stats_report_lines as evidence_store_stats_lines
+from citeguard_fetch_pipeline import configure as configure_fetch_pipeline, iter_completed
+from citeguard_evidence import (fetch_url, discover_linked_artifacts, iter_artifact_pages, needs_extraction, extract_to_cache,
+                                count_worker_extraction, text_cache_report_lines, reset_probe_cache)
+
+def _best_snippets(claims: List[str], pages: Iterable[str], k: int = 3, stop_at: float = 2.0,
+                   k1: float = 1.2, b: float = 0.75) -> Tuple[List[Tuple[float,str]], bool]:
+    """Best (jaccard, snippet) per claim and whether any text was seen.
+
+    The evidence is chunked once into a BM25 PassageIndex that every claim
+    queries; a claim is scored by the best jaccard among its top k passages.
+    Pages are read lazily and, after each page, reading stops once every
+    claim has a snippet at `stop_at`; otherwise the whole document is indexed.
+    """
+    claim_toks = [tokenize(c).ids for c in claims]
+    index = PassageIndex(k1=k1, b=b)
+    checked_page = 0
+    for page_no, passage in chunk_pages(pages):
+        if page_no > checked_page:
+            checked_page = page_no
+            if all(ov >= stop_at for ov, _ in index.best_matches(claim_toks, k)):
+                break
+        index.add(passage)
+    return index.best_matches(claim_toks, k), len(index) > 0
 
 def _verdict_from_overlap(overlap: float, neg_hit: bool, supported_thr: float, weak_thr: float) -> Tuple[str,float]:
     # crude: overlap acts like confidence; negation flips to contradicted if high
@@ -38,11 +44,9 @@ def _verdict_from_overlap(overlap: float, neg_hit: bool, supported_thr: float, w
         return ("weakly_supported", conf)
     return ("unsupported", conf)
 
-def run_ground(tex_path: Path, bib_path: Path, out_dir: Path, args) -> int:
-    cfg = {}
-    cfg_path = Path(args.config)
-    if cfg_path.exists():
-        cfg = load_yaml(cfg_path.read_text(encoding="utf-8"))
+def run_ground(tex_path: Path, bib_path: Path, out_dir: Path, args, ctx: Optional[RunContext] = None) -> int:
+    ctx = ctx or RunContext(tex_path, bib_path, out_dir, args)
+    cfg = ctx.config()
     evidence_pref = cfg.get("evidence_preference") or ["md","html","htm","tex","rtf","txt","pdf"]
     timeout = int(cfg.get("http_timeout_sec") or 25)
     max_bytes = int(cfg.get("http_max_bytes") or 15000000)
@@ -52,33 +56,37 @@ def run_ground(tex_path: Path, bib_path: Path, out_dir: Path, args) -> int:
         fetch_enabled = True
     if getattr(args, "no_fetch", False):
         fetch_enabled = False
+    fetch_jobs = max(1, int(getattr(args, "jobs", None) or (cfg.get("ground_fetch") or {}).get("jobs") or 1))
+    configure_http(cfg, fetch_jobs)
+    if fetch_enabled:
+        # the shared store lives in the user cache dir; out/evidence_cache if that is unusable
+        configure_evidence_store(cfg, out_dir / "evidence_cache")
+    configure_fetch_pipeline(cfg)
+    configure_similarity(cfg)
+    reset_probe_cache()
+    extract_workers = max(1, int(getattr(args, "extract_workers", None) or (cfg.get("grounding") or {}).get("extract_workers") or 1))
 
     grounding_cfg = cfg.get("grounding") or {}
     supported_thr = float(grounding_cfg.get("supported_threshold", 0.75))
     weak_thr = float(grounding_cfg.get("weak_threshold", 0.60))
+    top_k = int(grounding_cfg.get("passages_per_claim", 3))
+    bm25_k1 = float(grounding_cfg.get("bm25_k1", 1.2))
+    bm25_b = float(grounding_cfg.get("bm25_b", 0.75))
     sota_keywords = grounding_cfg.get("sota_keywords") or []
     strong_verbs = grounding_cfg.get("strong_claim_verbs") or []
     neg_tokens = set((grounding_cfg.get("negation_tokens") or []))
 
-    csv_path = out_dir/"audit_references.csv"
-    rows, cols = load_rows(csv_path)
-    target_rows = filter_rows(rows, args.only)
+    rows = ctx.table()
+    target_rows = rows.filter(args.only)
 
-    entries = {e.key: e for e in parse_bib_file(bib_path)}
+    entries = ctx.bib_entries()
 
-    citation_uses, usage_count, spans = parse_tex_project(tex_path)
+    citation_uses, usage_count, spans = ctx.tex()
     claims = extract_claims_from_citations(citation_uses, sota_keywords, strong_verbs)
     claims += extract_uncited_high_priority_sentences(spans)
 
-    _safe_mkdir(out_dir/"evidence_cache")
-    # load resolution cache for URLs/ids
-    res_cache_path = out_dir/"resolution_cache.json"
-    res_cache = {}
-    if res_cache_path.exists():
-        try:
-            res_cache = json.loads(res_cache_path.read_text(encoding="utf-8"))
-        except Exception:
-            res_cache = {}
+    # resolution cache for URLs/ids
+    res_cache = ctx.resolution_cache()
 
     # Build claim map per reference key
     claims_by_ref: Dict[str, List[dict]] = {}
@@ -97,7 +105,7 @@ def run_ground(tex_path: Path, bib_path: Path, out_dir: Path, args) -> int:
             })
 
     # save claims
-    (out_dir/"claims.json").write_text(json.dumps([cl.__dict__ for cl in claims], indent=2), encoding="utf-8")
+    ctx.write_text("claims.json", json.dumps([cl.__dict__ for cl in claims], indent=2))
 
     # evidence cache map
     evidence_index = {}
@@ -132,70 +140,51 @@ def run_ground(tex_path: Path, bib_path: Path, out_dir: Path, args) -> int:
                 seen.add(u); out.append(u)
         return out
 
-    # Heuristic grounding per reference
-    for r in target_rows:
-        key = r["bib_key"]
-        ref_claims = claims_by_ref.get(key, [])
-        if not ref_claims:
-            # not cited; neutral ground score, but low confidence
-            update_row(rows, key, {
-                "ground_quality":"70",
-                "ground_confidence":"40",
-                "ground_remediation":"Reference not cited in TeX; remove if unintended, or add intended citation context."
-            })
-            continue
+    pref_rank={ext:i for i,ext in enumerate(evidence_pref)}
+
+    def acquire(key: str) -> list:
+        """Fetch evidence for one reference (best effort); artifacts in preference order."""
+        artifacts=[]
+        # try direct fetch for preferred exts from urls
+        for u in candidate_urls_for_ref(key):
+            # If URL points to PDF/html etc, fetch directly
+            art = fetch_url(u, timeout, max_bytes, ua)
+            if art:
+                artifacts.append(art)
+            # If we fetched html, also discover linked artifacts from the same download
+            if art and art.fmt=="html":
+                artifacts += discover_linked_artifacts(art, evidence_pref, timeout, max_bytes, ua)
+            if len(artifacts) >= 6:
+                break
+        # pick best artifact by preference order
+        return sorted(artifacts, key=lambda a: pref_rank.get(a.fmt, 99))
 
-        # fetch evidence (best effort)
-        text_blob=""
+    def score(key: str, artifacts_sorted) -> dict:
+        """Grade one reference's claims against its evidence (None = fetching disabled)."""
+        ref_claims = claims_by_ref[key]
         evidence_conf = 0.0
         chosen_art=None
-        if fetch_enabled:
-            ref_dir = out_dir/"evidence_cache"/key
-            _safe_mkdir(ref_dir)
-            urls = candidate_urls_for_ref(key)
-            artifacts=[]
-            # try direct fetch for preferred exts from urls
-            for u in urls:
-                # If URL points to PDF/html etc, fetch directly
-                art = fetch_url(u, ref_dir, timeout, max_bytes, ua)
-                if art:
-                    artifacts.append(art)
-                # If we fetched html, also discover linked artifacts
-                if u.lower().endswith((".html",".htm")) or (art and art.fmt=="html") or ("arxiv.org/abs/" in u):
-                    artifacts += discover_linked_artifacts(u, evidence_pref, ref_dir, timeout, max_bytes, ua)
-                if len(artifacts) >= 6:
-                    break
-            # pick best artifact by preference order
-            pref_rank={ext:i for i,ext in enumerate(evidence_pref)}
-            artifacts_sorted = sorted(artifacts, key=lambda a: pref_rank.get(a.fmt, 99))
-            if artifacts_sorted:
-                chosen_art = artifacts_sorted[0]
-                text_blob = extract_text_from_artifact(chosen_art)
-                evidence_conf = 0.9 if chosen_art.fmt in ("md","html","txt","tex") else (0.75 if chosen_art.fmt=="pdf" else 0.5)
-                evidence_index[key]={"chosen": chosen_art.__dict__, "all":[a.__dict__ for a in artifacts_sorted[:10]]}
-        else:
-            evidence_index[key]={"chosen": None, "all":[]}
+        index_entry = {"chosen": None, "all":[]} if artifacts_sorted is None else None
+        pages: Iterable[str] = []
+        if artifacts_sorted:
+            chosen_art = artifacts_sorted[0]
+            pages = iter_artifact_pages(chosen_art)
+            evidence_conf = 0.9 if chosen_art.fmt in ("md","html","txt","tex") else (0.75 if chosen_art.fmt=="pdf" else 0.5)
+            index_entry={"chosen": chosen_art.__dict__, "all":[a.__dict__ for a in artifacts_sorted[:10]]}
+        # pages are extracted and indexed only until every claim is supported
+        best, has_text = _best_snippets([cl["text"] for cl in ref_claims], pages, k=top_k, stop_at=supported_thr,
+                                        k1=bm25_k1, b=bm25_b)
+        if hasattr(pages, "close"):
+            pages.close()
 
         # evaluate each claim
         verdict_points=[]
         hp_fail=False
         sota_risky=False
-        for cl in ref_claims:
-            claim_text = cl["text"]
-            if not text_blob:
-                verdict="unsupported"; conf=0.0; overlap=0.0
-            else:
-                snippets = _top_snippets(claim_text, text_blob, k=3)
-                # overlap against best snippet
-                best_overlap=0.0
-                best_snip=""
-                for sn in snippets:
-                    ov = jaccard(claim_text, sn)
-                    if ov > best_overlap:
-                        best_overlap=ov; best_snip=sn
-                neg_hit = any(tok in best_snip.lower() for tok in neg_tokens)
-                verdict, conf = _verdict_from_overlap(best_overlap, neg_hit, supported_thr, weak_thr)
-                overlap=best_overlap
+        ref_rewrites=[]
+        for cl, (best_overlap, best_snip) in zip(ref_claims, best):
+            neg_hit = any(tok in best_snip.lower() for tok in neg_tokens)
+            verdict, conf = _verdict_from_overlap(best_overlap, neg_hit, supported_thr, weak_thr)
 
             pts = 1.0 if verdict=="supported" else (0.6 if verdict=="weakly_supported" else (0.0 if verdict=="unsupported" else -0.5))
             verdict_points.append(pts)
@@ -204,8 +193,8 @@ def run_ground(tex_path: Path, bib_path: Path, out_dir: Path, args) -> int:
             if cl["priority"]=="high" and verdict in ("unsupported","contradicted"):
                 hp_fail=True
                 # propose rewrite (very simple hedge)
-                rewrites.append(f"% {cl['file']}:{cl['line']}\n% Original: {cl['text']}\n")
-                rewrites.append(f"% Suggested: (needs evidence) Consider hedging: "{cl['text']}" -> "{cl['text'].replace('demonstrates','suggests').replace('proves','suggests')}"\n\n")
+                ref_rewrites.append(f"% {cl['file']}:{cl['line']}\n% Original: {cl['text']}\n")
+                ref_rewrites.append(f"% Suggested: (needs evidence) Consider hedging: \"{cl['text']}\" -> \"{cl['text'].replace('demonstrates','suggests').replace('proves','suggests')}\"\n\n")
 
             # SOTA risk: if claim is SOTA and evidence weak OR ref unresolved
             if cl.get("is_sota") and verdict in ("unsupported","weakly_supported"):
@@ -216,7 +205,7 @@ def run_ground(tex_path: Path, bib_path: Path, out_dir: Path, args) -> int:
         ground_conf = int(max(10, min(100, evidence_conf*100)))
 
         rem = []
-        if not text_blob:
+        if not has_text:
             rem.append("Fetch evidence (enable --fetch) or provide local PDFs/text for grounding.")
         if hp_fail:
             rem.append("High-priority (abstract/conclusion) claim unsupported: rewrite or add stronger citation.")
@@ -224,30 +213,81 @@ def run_ground(tex_path: Path, bib_path: Path, out_dir: Path, args) -> int:
             rem.append("SOTA-like claim weakly supported: add direct benchmark/baseline citation or hedge language.")
         remediation = " | ".join(rem) if rem else "OK: evidence supports usage; ensure citations match exact setting."
 
-        update_row(rows, key, {
-            "ground_quality": f"{ground_quality:.0f}",
-            "ground_confidence": str(ground_conf),
-            "ground_remediation": remediation
-        })
+        return {
+            "updates": {
+                "ground_quality": f"{ground_quality:.0f}",
+                "ground_confidence": str(ground_conf),
+                "ground_remediation": remediation
+            },
+            "report": f"## {key}\n- ground_quality={ground_quality:.0f} ground_confidence={ground_conf}\n- remediation: {remediation}\n\n",
+            "rewrites": ref_rewrites,
+            "index": index_entry,
+            "signals": {
+                "high_priority_claim_unsupported": hp_fail,
+                "sota_claim_weak_support": sota_risky,
+                "evidence_format": (chosen_art.fmt if chosen_art else None),
+                "evidence_available": has_text
+            },
+        }
 
-        grounding_report.append(f"## {key}\n- ground_quality={ground_quality:.0f} ground_confidence={ground_conf}\n- remediation: {remediation}\n\n")
+    # fetch evidence for every cited reference up front; score each one as its downloads finish
+    cited = [r["bib_key"] for r in target_rows if claims_by_ref.get(r["bib_key"])]
+    scored: Dict[str, dict] = {}
+    if fetch_enabled:
+        if extract_workers > 1:
+            # uncached PDFs are parsed in worker processes (whole document); the rest are scored right away
+            # fetch threads are running when the first job is submitted: never fork this process
+            ctx_name = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            with ProcessPoolExecutor(max_workers=extract_workers, mp_context=multiprocessing.get_context(ctx_name)) as extract_pool:
+                pending = {}
+                for key, artifacts in iter_completed(dict.fromkeys(cited), acquire, fetch_jobs):
+                    if artifacts and needs_extraction(artifacts[0]):
+                        pending[extract_pool.submit(extract_to_cache, artifacts[0])] = (key, artifacts)
+                    else:
+                        scored[key] = score(key, artifacts)
+                for fut in as_completed(pending):
+                    key, artifacts = pending[fut]
+                    try:
+                        fut.result()
+                        count_worker_extraction()
+                    except Exception:
+                        pass
+                    scored[key] = score(key, artifacts)
+        else:
+            for key, artifacts in iter_completed(dict.fromkeys(cited), acquire, fetch_jobs):
+                scored[key] = score(key, artifacts)
+
+    # Heuristic grounding per reference, written in row order
+    for r in target_rows:
+        key = r["bib_key"]
+        if not claims_by_ref.get(key):
+            # not cited; neutral ground score, but low confidence
+            rows.update(key, {
+                "ground_quality":"70",
+                "ground_confidence":"40",
+                "ground_remediation":"Reference not cited in TeX; remove if unintended, or add intended citation context."
+            })
+            continue
+        res = scored.get(key) or score(key, None)
+        if res["index"] is not None:
+            evidence_index[key] = res["index"]
+        rewrites += res["rewrites"]
+        rows.update(key, res["updates"])
+        grounding_report.append(res["report"])
 
         # store signals for review stage
         res_cache.setdefault(key, {})
         res_cache[key].setdefault("ground_signals", {})
-        res_cache[key]["ground_signals"].update({
-            "high_priority_claim_unsupported": hp_fail,
-            "sota_claim_weak_support": sota_risky,
-            "evidence_format": (chosen_art.fmt if chosen_art else None),
-            "evidence_available": bool(text_blob)
-        })
-
-    (out_dir/"grounding_report.md").write_text("".join(grounding_report), encoding="utf-8")
-    (out_dir/"rewrites.tex").write_text("".join(rewrites), encoding="utf-8")
-    (out_dir/"evidence_index.json").write_text(json.dumps(evidence_index, indent=2), encoding="utf-8")
-    # update cache with ground signals
-    res_cache_path.write_text(json.dumps(res_cache, indent=2), encoding="utf-8")
+        res_cache[key]["ground_signals"].update(res["signals"])
 
-    write_rows_atomic(csv_path, rows, cols)
+    grounding_report += evidence_store_stats_lines()
+    grounding_report += text_cache_report_lines()
+    grounding_report += http_stats_lines()
+    ctx.write_text("grounding_report.md", "".join(grounding_report))
+    ctx.write_text("rewrites.tex", "".join(rewrites))
+    ctx.write_text("evidence_index.json", json.dumps(evidence_index, indent=2))
+    # update cache with ground signals
+    ctx.save_resolution_cache(res_cache)
+    ctx.end_stage()
     print(f"[ground] updated {len(target_rows)} references; wrote claims.json, grounding_report.md, rewrites.tex")
     return 0
@@ -0,0 +1,30 @@
+from __future__ import annotations
+from pathlib import Path
+import os
+from citeguard_yaml import load_yaml
+from citeguard_local_index import LocalIndex, default_index_path
+
+def run_index(tex_path: Path, bib_path: Path, out_dir: Path, args) -> int:
+    cfg={}
+    cfg_path=Path(args.config)
+    if cfg_path.exists():
+        cfg=load_yaml(cfg_path.read_text(encoding="utf-8"))
+    li = cfg.get("local_index") or {}
+    if args.index_path:
+        path = Path(args.index_path)
+    elif li.get("path"):
+        path = Path(os.path.expanduser(str(li["path"])))
+    else:
+        path = default_index_path()
+
+    if not args.dblp_xml and not args.openalex_jsonl:
+        print("[index] nothing to ingest: pass --dblp-xml and/or --openalex-jsonl")
+        return 2
+    for src in (args.dblp_xml, args.openalex_jsonl):
+        if src and not Path(src).exists():
+            print(f"[index] missing input file: {src}")
+            return 2
+
+    counts = LocalIndex.build(path, dblp_xml=args.dblp_xml, openalex_jsonl=args.openalex_jsonl)
+    print(f"[index] wrote {path} (dblp={counts['dblp']}, openalex={counts['openalex']} works)")
+    return 0
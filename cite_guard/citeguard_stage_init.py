@@ -2,14 +2,16 @@ from __future__ import annotations
 from pathlib import Path
 import json
 from datetime import datetime, timezone
-from citeguard_csv import required_columns, write_rows_atomic
-from citeguard_bib_parse import parse_bib_file
+from typing import Optional
+from citeguard_csv import required_columns
+from citeguard_context import RunContext
 
 STAGES = ["audit","resolve","ground","venue","ml"]
 
-def run_init(tex_path: Path, bib_path: Path, out_dir: Path, args) -> int:
+def run_init(tex_path: Path, bib_path: Path, out_dir: Path, args, ctx: Optional[RunContext] = None) -> int:
     out_dir.mkdir(parents=True, exist_ok=True)
-    entries = parse_bib_file(bib_path)
+    ctx = ctx or RunContext(tex_path, bib_path, out_dir, args)
+    entries = ctx.bib_list()
     if not entries:
         raise SystemExit("No BibTeX entries found in bib file.")
 
@@ -30,8 +32,7 @@ def run_init(tex_path: Path, bib_path: Path, out_dir: Path, args) -> int:
         row["review_priority"]=""
         rows.append(row)
 
-    csv_path = out_dir/"audit_references.csv"
-    write_rows_atomic(csv_path, rows, cols)
+    ctx.create_table(rows, cols)
 
     meta = {
         "pipeline_version":"1.0.0",
@@ -41,6 +42,7 @@ def run_init(tex_path: Path, bib_path: Path, out_dir: Path, args) -> int:
         "out": str(out_dir),
         "args": vars(args),
     }
-    (out_dir/"citeguard_run_meta.json").write_text(json.dumps(meta, indent=2), encoding="utf-8")
-    print(f"[init] wrote {csv_path} with {len(rows)} references")
+    ctx.write_text("citeguard_run_meta.json", json.dumps(meta, indent=2))
+    ctx.end_stage()
+    print(f"[init] wrote {ctx.table_path} with {len(rows)} references")
     return 0
@@ -1,9 +1,8 @@
 from __future__ import annotations
 from pathlib import Path
-import json, re
-from citeguard_csv import load_rows, filter_rows, update_row, write_rows_atomic
-from citeguard_yaml import load_yaml
-from citeguard_bib_parse import parse_bib_file
+import re
+from typing import Optional
+from citeguard_context import RunContext
 
 TOP_ML_VENUES = ["neurips","icml","iclr","aaai","aistats","colt","acl","emnlp","naacl"]
 
@@ -11,25 +10,16 @@ def _is_canonical(venue: str) -> bool:
     v=(venue or "").lower()
     return any(x in v for x in TOP_ML_VENUES)
 
-def run_ml(tex_path: Path, bib_path: Path, out_dir: Path, args) -> int:
-    cfg={}
-    cfg_path=Path(args.config)
-    if cfg_path.exists():
-        cfg=load_yaml(cfg_path.read_text(encoding="utf-8"))
+def run_ml(tex_path: Path, bib_path: Path, out_dir: Path, args, ctx: Optional[RunContext] = None) -> int:
+    ctx = ctx or RunContext(tex_path, bib_path, out_dir, args)
+    cfg = ctx.config()
     profile = (args.ml_profile or cfg.get("ml_profile") or "neurips").lower()
 
-    csv_path=out_dir/"audit_references.csv"
-    rows, cols = load_rows(csv_path)
-    target_rows = filter_rows(rows, args.only)
+    rows = ctx.table()
+    target_rows = rows.filter(args.only)
 
-    entries = {e.key: e for e in parse_bib_file(bib_path)}
-    res_cache_path = out_dir/"resolution_cache.json"
-    res_cache={}
-    if res_cache_path.exists():
-        try:
-            res_cache=json.loads(res_cache_path.read_text(encoding="utf-8"))
-        except Exception:
-            res_cache={}
+    entries = ctx.bib_entries()
+    res_cache = ctx.resolution_cache()
 
     report=["# ml_report\n\n"]
 
@@ -37,7 +27,7 @@ def run_ml(tex_path: Path, bib_path: Path, out_dir: Path, args) -> int:
         key=r["bib_key"]
         e=entries.get(key)
         if not e:
-            update_row(rows,key,{"ml_quality":"0","ml_confidence":"20","ml_remediation":"Missing bib entry; rerun init or fix --bib."})
+            rows.update(key, {"ml_quality":"0","ml_confidence":"20","ml_remediation":"Missing bib entry; rerun init or fix --bib."})
             continue
         fields={k.lower(): (v or "").strip() for k,v in (e.fields or {}).items()}
         venue = fields.get("booktitle") or fields.get("journal") or fields.get("publisher") or ""
@@ -61,11 +51,11 @@ def run_ml(tex_path: Path, bib_path: Path, out_dir: Path, args) -> int:
         if q < 60:
             rem.append("Check relevance to task/setting; consider replacing with survey/benchmark paper.")
         remediation=" | ".join(rem) if rem else "OK for ML venue lens."
-        update_row(rows,key,{"ml_quality":str(q),"ml_confidence":str(c),"ml_remediation":remediation})
+        rows.update(key, {"ml_quality":str(q),"ml_confidence":str(c),"ml_remediation":remediation})
         if q<75:
             report.append(f"- {key}: Q={q} C={c} — {remediation}\n")
 
-    (out_dir/"ml_report.md").write_text("".join(report), encoding="utf-8")
-    write_rows_atomic(csv_path, rows, cols)
+    ctx.write_text("ml_report.md", "".join(report))
+    ctx.end_stage()
     print(f"[ml] updated {len(target_rows)} references; wrote ml_report.md (profile={profile})")
     return 0
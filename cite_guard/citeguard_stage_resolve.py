@@ -1,10 +1,17 @@
 from __future__ import annotations
 from pathlib import Path
-import json, re
-from citeguard_csv import load_rows, filter_rows, update_row, write_rows_atomic
-from citeguard_bib_parse import parse_bib_file
-from citeguard_similarity import jaccard, author_overlap
-from citeguard_resolve_backends import resolve_openalex, resolve_crossref, resolve_dblp, resolve_arxiv
+from datetime import datetime, timezone
+import hashlib, re, threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from citeguard_context import RunContext
+from citeguard_similarity import jaccard, author_overlap, configure as configure_similarity
+from citeguard_breaker import BackendUnavailable, configure as configure_breakers, report_lines as breaker_report_lines
+from citeguard_cascade import BackendStats, run_cascade
+from citeguard_http import configure as configure_http, stats_report_lines as http_stats_lines
+from citeguard_response_cache import configure as configure_response_cache, stats_report_lines as response_cache_stats_lines
+from citeguard_local_index import configure as configure_local_index, resolve_local
+from citeguard_resolve_backends import Candidate, ARXIV_BATCH_SIZE, OPENALEX_DOI_BATCH_SIZE, normalize_doi, resolve_crossref_doi, resolve_openalex_doi_batch, resolve_openalex, resolve_crossref, resolve_dblp, resolve_arxiv, resolve_arxiv_batch
 
 def _int(x):
     try:
@@ -12,192 +19,428 @@ def _int(x):
     except Exception:
         return None
 
-def run_resolve(tex_path: Path, bib_path: Path, out_dir: Path, args) -> int:
-    csv_path = out_dir / "audit_references.csv"
-    rows, cols = load_rows(csv_path)
-    target_rows = filter_rows(rows, args.only)
-    entries = {e.key: e for e in parse_bib_file(bib_path)}
+BACKENDS = ("doi", "arxiv", "local", "openalex", "crossref", "dblp")
+FUZZY_BACKENDS = ("openalex", "crossref", "dblp")
 
-    # config: try reading YAML file if present (optional). We'll keep simple.
-    cfg_path = Path(args.config)
-    cfg = {}
-    if cfg_path.exists():
+def _query_from_entry(e) -> dict:
+    fields = {k.lower(): v for k,v in (e.fields or {}).items()}
+    arxiv_id = fields.get("eprint","") or ""
+    if not arxiv_id:
+        # common patterns
+        url = fields.get("url","")
+        m = re.search(r'arxiv\.org/(abs|pdf)/(?P<id>\d{4}\.\d{4,5})', url or "")
+        if m:
+            arxiv_id = m.group("id")
+    return {
+        "fields": fields,
+        "title": fields.get("title",""),
+        "author": fields.get("author",""),
+        "year": _int(fields.get("year")),
+        "venue": fields.get("journal") or fields.get("booktitle") or fields.get("publisher") or "",
+        "doi": fields.get("doi",""),
+        "arxiv_id": arxiv_id,
+    }
+
+def _fingerprint(qd: dict) -> str:
+    """Hash of the entry fields that influence resolution; unchanged hash => reuse the cached record."""
+    f = qd["fields"]
+    parts = [f.get(k, "") for k in ("title", "author", "year", "doi", "eprint", "url")] + [qd["venue"]]
+    norm = "\x1f".join(re.sub(r'\s+', ' ', str(p)).strip().lower() for p in parts)
+    return hashlib.sha256(norm.encode("utf-8")).hexdigest()
+
+def _reusable(rec: dict | None, fp: str, force: bool, max_age_days: float | None, now: datetime,
+              offline: bool = False) -> bool:
+    if force or not rec or rec.get("fingerprint") != fp or "status" not in rec:
+        return False
+    if rec.get("offline") and not offline:
+        # only the local index was asked: an online run queries the network backends
+        return False
+    if rec.get("backend_outage") and rec.get("status") != "resolved":
+        # left unresolved/ambiguous while a backend was down: try again
+        return False
+    if max_age_days is not None:
         try:
-            from citeguard_yaml import load_yaml
-            cfg = load_yaml(cfg_path.read_text(encoding="utf-8"))
+            age = now - datetime.fromisoformat(rec.get("resolved_at", ""))
         except Exception:
-            cfg = {}
+            return False
+        if age.total_seconds() > max_age_days * 86400:
+            return False
+    return True
+
+def _thresholds(cfg: dict) -> dict:
     thr = (cfg.get("resolve_thresholds") or {})
-    pass_t = float(thr.get("title_similarity_pass", 0.92))
-    pass_a = float(thr.get("author_overlap_pass", 0.70))
-    pass_y = int(thr.get("year_diff_pass", 1))
-    review_t = float(thr.get("title_similarity_review", 0.86))
-    review_a = float(thr.get("author_overlap_review", 0.55))
-    max_cand = int(thr.get("max_candidates", 3))
+    return {
+        "pass_t": float(thr.get("title_similarity_pass", 0.92)),
+        "pass_a": float(thr.get("author_overlap_pass", 0.70)),
+        "pass_y": int(thr.get("year_diff_pass", 1)),
+        "review_t": float(thr.get("title_similarity_review", 0.86)),
+        "review_a": float(thr.get("author_overlap_review", 0.55)),
+        "max_cand": int(thr.get("max_candidates", 3)),
+    }
 
-    timeout = int((cfg.get("http_timeout_sec") or 25))
-    ua = str(cfg.get("user_agent") or "refqa/1.0")
+def _backend_lookup(backend: str, qd: dict, timeout: int, ua: str) -> List[Candidate]:
+    if backend == "doi":
+        cand = resolve_crossref_doi(qd["doi"], qd["title"], qd["author"], qd["year"], timeout=timeout, ua=ua)
+        return [cand] if cand else []
+    if backend == "arxiv":
+        cand = resolve_arxiv(qd["arxiv_id"], timeout=timeout, ua=ua)
+        return [cand] if cand else []
+    if backend == "local":
+        return resolve_local(qd["title"], qd["author"], qd["year"], doi=qd["doi"], arxiv_id=qd["arxiv_id"])
+    if backend == "openalex":
+        return resolve_openalex(qd["title"], qd["author"], qd["year"], timeout=timeout, ua=ua)
+    if backend == "crossref":
+        return resolve_crossref(qd["title"], qd["author"], qd["year"], timeout=timeout, ua=ua)
+    if backend == "dblp":
+        return resolve_dblp(qd["title"], timeout=timeout, ua=ua)
+    raise ValueError(f"Unknown resolve backend: {backend}")
+
+def _signals(qd: dict, canonical: dict) -> Tuple[float, float, int]:
+    """(title similarity, author overlap, year diff) of the bib entry against a canonical record."""
+    year = qd["year"]
+    can_year = canonical.get("year")
+    ts = jaccard(qd["title"], canonical.get("title",""))
+    ao = author_overlap(qd["author"], canonical.get("authors",""))
+    yd = abs((year or can_year or 0) - (can_year or year or 0)) if (year or can_year) else 99
+    return ts, ao, yd
+
+def _passes(qd: dict, cand: Candidate, thr: dict) -> bool:
+    ts, ao, yd = _signals(qd, cand.canonical)
+    return ts >= thr["pass_t"] and ao >= thr["pass_a"] and yd <= thr["pass_y"]
+
+def _gather_candidates(queries: Dict[str, dict], jobs: int, timeout: int, ua: str, thr: dict,
+                       arxiv_batch_size: int = ARXIV_BATCH_SIZE, exact_fast_path: bool = True,
+                       doi_batch_size: int = OPENALEX_DOI_BATCH_SIZE, cascade: Optional[dict] = None,
+                       local: bool = False, offline: bool = False
+                       ) -> Tuple[Dict[Tuple[str,str], List[Candidate]], Dict[str, set]]:
+    """Run every (bib_key, backend) lookup, serially or on a bounded thread pool.
 
-    cache_path = out_dir / "resolution_cache.json"
-    cache = {}
-    if cache_path.exists():
+    With `local`, the offline metadata index is asked first; with
+    exact_fast_path a reference it already resolves makes no network calls,
+    and `offline` stops after the index. Network exact lookups go first: DOIs in bulk OpenAlex doi: filter batches
+    (Crossref /works/{doi} for the ones it misses) and arXiv ids in id_list
+    batches. With
+    exact_fast_path, a reference whose exact record already clears the pass
+    thresholds skips the fuzzy title searches. With `cascade`
+    ({"stats": BackendStats, "hedge_after_sec": float}) the fuzzy backends are
+    tried adaptively instead of all at once. Results are keyed by
+    (bib_key, backend) so callers can reassemble them in a fixed order
+    regardless of completion order; the second value maps bib_key to the
+    backends that were down (or circuit-open) for it.
+    """
+    outages: Dict[str, set] = {}
+    outage_lock = threading.Lock()
+
+    def mark_outage(key: str, backend: str) -> None:
+        with outage_lock:
+            outages.setdefault(key, set()).add(backend)
+
+    def run(task: Tuple[str,str]) -> List[Candidate]:
+        key, b = task
         try:
-            cache = json.loads(cache_path.read_text(encoding="utf-8"))
+            return _backend_lookup(b, queries[key], timeout, ua)
+        except BackendUnavailable as ex:
+            mark_outage(key, ex.backend)
+            return []
         except Exception:
-            cache = {}
+            return []
+
+    def run_all(tasks: List[Tuple[str,str]]) -> Dict[Tuple[str,str], List[Candidate]]:
+        if jobs <= 1 or len(tasks) <= 1:
+            results = [run(t) for t in tasks]
+        else:
+            with ThreadPoolExecutor(max_workers=jobs) as pool:
+                results = list(pool.map(run, tasks))
+        return dict(zip(tasks, results))
+
+    found: Dict[Tuple[str,str], List[Candidate]] = {}
+    if local or offline:
+        # index lookups are local SQLite reads: serial is fast enough
+        for key in queries:
+            found[(key, "local")] = run((key, "local"))
+        if offline:
+            return found, outages
+        if exact_fast_path:
+            queries = {key: qd for key, qd in queries.items()
+                       if not any(_passes(qd, c, thr) for c in found[(key, "local")])}
+
+    # 1) DOI exact: bulk OpenAlex doi: filter first, Crossref /works/{doi} for whatever it missed
+    doi_refs = {key: qd for key, qd in queries.items() if qd["doi"]}
+    missed: List[str] = []
+    bulk = resolve_openalex_doi_batch(doi_refs, timeout, ua, doi_batch_size, missed) if doi_refs else {}
+    for key in missed:
+        mark_outage(key, "openalex")
+    found.update(run_all([(key, "doi") for key in doi_refs if key not in bulk]))
+    for key, cand in bulk.items():
+        found[(key, "doi")] = [cand]
+
+    # 2) arXiv exact, batched
+    arxiv_keys = {key: qd["arxiv_id"] for key, qd in queries.items() if qd["arxiv_id"]}
+    missed = []
+    arxiv_found = resolve_arxiv_batch(list(arxiv_keys.values()), timeout, ua, arxiv_batch_size, missed) if arxiv_keys else {}
+    for key, aid in arxiv_keys.items():
+        if aid in missed:
+            mark_outage(key, "arxiv")
+    for key, aid in arxiv_keys.items():
+        found[(key, "arxiv")] = [arxiv_found[aid]] if aid in arxiv_found else []
+
+    # 3) OpenAlex and Crossref fuzzy, DBLP tie-break
+    fuzzy_keys = []
+    for key, qd in queries.items():
+        if not qd["title"]:
+            continue
+        if exact_fast_path and any(_passes(qd, c, thr) for b in ("doi", "arxiv") for c in found.get((key, b), [])):
+            continue
+        fuzzy_keys.append(key)
+
+    if cascade is None:
+        found.update(run_all([(key, b) for key in fuzzy_keys for b in FUZZY_BACKENDS]))
+        return found, outages
+
+    # cascade: per reference, stop at the first backend that clears the pass thresholds
+    stats, hedge_after = cascade["stats"], float(cascade.get("hedge_after_sec") or 0)
+    order = stats.order(FUZZY_BACKENDS)
+
+    def cascade_one(key: str) -> Dict[str, List[Candidate]]:
+        qd = queries[key]
+        return run_cascade(order, lambda b: run((key, b)), lambda cs: any(_passes(qd, c, thr) for c in cs),
+                           stats, lookup_pool, hedge_after)
+
+    # backend calls go to their own pool so per-reference cascades can block on them
+    with ThreadPoolExecutor(max_workers=max(2, jobs * 2)) as lookup_pool:
+        if jobs <= 1 or len(fuzzy_keys) <= 1:
+            per_key = [cascade_one(k) for k in fuzzy_keys]
+        else:
+            with ThreadPoolExecutor(max_workers=jobs) as pool:
+                per_key = list(pool.map(cascade_one, fuzzy_keys))
+    for key, res in zip(fuzzy_keys, per_key):
+        for b, cands in res.items():
+            found[(key, b)] = cands
+    return found, outages
+
+def _resolve_record(qd: dict, candidates: List[Candidate], thr: dict) -> dict:
+    """Pick the best candidate and build the resolution_cache.json record for one reference."""
+    year, venue = qd["year"], qd["venue"]
+    doi, arxiv_id = qd["doi"], qd["arxiv_id"]
+
+    # pick best candidate by match_conf, boost if doi matches
+    best = None
+    for c in candidates:
+        mc = c.match_conf
+        if doi and normalize_doi(c.ids.get("doi","")) == normalize_doi(doi):
+            mc = min(1.0, mc + 0.10)
+        if arxiv_id and c.ids.get("arxiv","") == arxiv_id:
+            mc = min(1.0, mc + 0.10)
+        if (best is None) or mc > best.match_conf:
+            best = type(c)(source=c.source, match_conf=mc, canonical=c.canonical, ids=c.ids)
+
+    if best is None:
+        return {"status":"unresolved","candidates":[]}
+
+    # compute title and author overlaps against canonical
+    can_year = best.canonical.get("year")
+    ts, ao, yd = _signals(qd, best.canonical)
+
+    status = "needs_review"
+    if ts >= thr["pass_t"] and ao >= thr["pass_a"] and yd <= thr["pass_y"]:
+        status = "resolved"
+    elif ts >= thr["review_t"] and ao >= thr["review_a"]:
+        status = "needs_review"
+    else:
+        status = "unresolved"
+
+    # mismatch flags
+    mismatch=[]
+    if year and can_year and int(year)!=int(can_year):
+        mismatch.append(f"year_mismatch(bib={year},can={can_year})")
+    if venue and best.canonical.get("venue") and venue.lower() not in str(best.canonical.get('venue','')).lower():
+        mismatch.append("venue_mismatch")
+
+    return {
+        "status": status,
+        "match_confidence": best.match_conf,
+        "canonical": best.canonical,
+        "ids": best.ids,
+        "signals": {"title_similarity": ts, "author_overlap": ao, "year_diff": yd},
+        "mismatch": mismatch
+    }
+
+def _row_updates(rec: dict) -> Dict[str,str]:
+    status = rec.get("status")
+    outage = ""
+    if rec.get("backend_outage") and status != "resolved":
+        outage = f"Backend outage ({', '.join(rec['backend_outage'])}): rerun resolve when the service is back. | "
+    if "canonical" not in rec:
+        return {
+            "resolve_quality":"10","resolve_confidence":"20",
+            "resolve_remediation":outage + "Unresolved: add DOI or arXiv ID; verify title/authors; replace if non-existent."
+        }
+    mconf = float(rec.get("match_confidence") or 0.0)
+    # quality/confidence mapping
+    if status == "resolved":
+        q = 95
+        c = int(min(100, 70 + mconf*30))
+        rem = "OK: resolved to canonical record; consider updating BibTeX with refs.corrected.bib."
+    elif status == "needs_review":
+        q = 65
+        c = int(min(90, 50 + mconf*40))
+        rem = "Review match: add DOI/arXiv ID and reconcile title/authors/year with canonical metadata."
+    else:
+        q = 25
+        c = int(min(60, 30 + mconf*30))
+        rem = "Likely mismatch/hallucination: verify existence; add DOI/arXiv; replace with verifiable source."
+    return {"resolve_quality": str(q), "resolve_confidence": str(c), "resolve_remediation": outage + rem}
+
+def _report_line(key: str, rec: dict) -> str:
+    outage = f" [backend outage: {','.join(rec['backend_outage'])}]" if rec.get("backend_outage") else ""
+    if "canonical" not in rec:
+        return f"- {key}: unresolved{outage}\n"
+    sig = rec.get("signals") or {}
+    return (f"- {key}: {rec['status']} (title_sim={sig.get('title_similarity',0):.2f}, "
+            f"author_overlap={sig.get('author_overlap',0):.2f}, year_diff={sig.get('year_diff')}) {';'.join(rec.get('mismatch') or [])}{outage}\n")
+
+def _corrected_bib_entry(key: str, entry_type: str, qd: dict, rec: dict) -> str:
+    # rewrite minimal BibTeX using original type and key; set title/author/year/url/doi
+    fields = qd["fields"]
+    can = rec.get("canonical") or {}
+    ids = rec.get("ids") or {}
+    can_doi = ids.get("doi","") or fields.get("doi","")
+    can_url = can.get("url","") or fields.get("url","")
+    can_authors = can.get("authors","") or fields.get("author","")
+    can_year_s = str(can.get("year") or fields.get("year",""))
+    can_title_s = can.get("title","") or fields.get("title","")
+    can_venue = can.get("venue","") or qd["venue"]
+    # choose field name for venue
+    venue_field = "journal" if entry_type in ("article",) else "booktitle"
+    bib = [f"@{entry_type}{{{key},"]
+    bib.append(f"  title={{ {can_title_s} }},")
+    if can_authors:
+        bib.append(f"  author={{ {can_authors} }},")
+    if can_year_s:
+        bib.append(f"  year={{ {can_year_s} }},")
+    if can_venue:
+        bib.append(f"  {venue_field}={{ {can_venue} }},")
+    if can_doi:
+        bib.append(f"  doi={{ {can_doi} }},")
+    if can_url:
+        bib.append(f"  url={{ {can_url} }},")
+    bib.append("}\n")
+    return "\n".join(bib)
+
+def run_resolve(tex_path: Path, bib_path: Path, out_dir: Path, args, ctx: Optional[RunContext] = None) -> int:
+    ctx = ctx or RunContext(tex_path, bib_path, out_dir, args)
+    rows = ctx.table()
+    target_rows = rows.filter(args.only)
+    entries = ctx.bib_entries()
+
+    cfg = ctx.config()
+    thr = _thresholds(cfg)
+
+    timeout = int((cfg.get("http_timeout_sec") or 25))
+    ua = str(cfg.get("user_agent") or "refqa/1.0")
+
+    cache = ctx.resolution_cache()
+
+    jobs = max(1, int(getattr(args, "jobs", None) or cfg.get("resolve_jobs") or 1))
+    configure_http(cfg, jobs)
+    configure_response_cache(cfg)
+    configure_breakers(cfg)
+    configure_similarity(cfg)
+    li_cfg = cfg.get("local_index") or {}
+    offline = bool(getattr(args, "offline", False) or li_cfg.get("offline", False))
+    index = configure_local_index(cfg)
+    local = index is not None
+    if offline and not local:
+        print("[resolve] offline mode but no local index found; run `index build` first")
+
+    force = bool(getattr(args, "force", False))
+    max_age = getattr(args, "max_age", None)
+    if max_age is None and cfg.get("resolve_cache_max_age_days") is not None:
+        max_age = float(cfg.get("resolve_cache_max_age_days"))
+    now = datetime.now(timezone.utc)
+
+    casc_cfg = cfg.get("resolve_cascade") or {}
+    cascade = None
+    if getattr(args, "cascade", False) or casc_cfg.get("enabled", False):
+        cascade = {"stats": BackendStats(out_dir / "backend_stats.json"),
+                   "hedge_after_sec": float(casc_cfg.get("hedge_after_sec", 0) or 0)}
 
     corrected_bib = []
 
     report_lines = ["# stage_resolve_report\n"]
 
+    queries = {}
+    fingerprints = {}
+    reused = set()
     for r in target_rows:
         key = r["bib_key"]
         e = entries.get(key)
         if not e:
-            update_row(rows, key, {
+            continue
+        queries[key] = _query_from_entry(e)
+        fingerprints[key] = _fingerprint(queries[key])
+        if _reusable(cache.get(key), fingerprints[key], force, max_age, now, offline):
+            reused.add(key)
+
+    # fan out every (reference, backend) lookup, then score serially in row order
+    found, outages = _gather_candidates({k: q for k, q in queries.items() if k not in reused}, jobs, timeout, ua, thr,
+                               int(cfg.get("arxiv_batch_size") or ARXIV_BATCH_SIZE),
+                               bool(cfg.get("resolve_exact_fast_path", True)),
+                               int(cfg.get("openalex_doi_batch_size") or OPENALEX_DOI_BATCH_SIZE),
+                               cascade, local, offline)
+
+    for r in target_rows:
+        key = r["bib_key"]
+        e = entries.get(key)
+        if not e:
+            rows.update(key, {
                 "resolve_quality":"0","resolve_confidence":"20",
                 "resolve_remediation":"Bib entry missing from current bib file; rerun init with correct --bib."
             })
             continue
-        fields = {k.lower(): v for k,v in (e.fields or {}).items()}
-        title = fields.get("title","")
-        author = fields.get("author","")
-        year = _int(fields.get("year"))
-        venue = fields.get("journal") or fields.get("booktitle") or fields.get("publisher") or ""
-        doi = fields.get("doi","")
-        arxiv_id = fields.get("eprint","") or ""
-        if not arxiv_id:
-            # common patterns
-            url = fields.get("url","")
-            m = re.search(r'arxiv\.org/(abs|pdf)/(?P<id>\d{4}\.\d{4,5})', url or "")
-            if m:
-                arxiv_id = m.group("id")
-
-        best = None
-        candidates = []
-
-        # 1) DOI exact: verify by querying OpenAlex/Crossref search by title; true DOI verification requires resolution
-        if doi:
-            # quick check: store doi, later compare if a candidate has same doi
-            pass
-
-        # 2) arXiv exact
-        if arxiv_id:
-            cand = resolve_arxiv(arxiv_id, timeout=timeout, ua=ua)
-            if cand:
-                candidates.append(cand)
-
-        # 3) OpenAlex and Crossref fuzzy
-        if title:
-            candidates += resolve_openalex(title, author, year, timeout=timeout, ua=ua)
-            candidates += resolve_crossref(title, author, year, timeout=timeout, ua=ua)
-            candidates += resolve_dblp(title, timeout=timeout, ua=ua)
-
-        # pick best candidate by match_conf, boost if doi matches
-        for c in candidates:
-            mc = c.match_conf
-            if doi and c.ids.get("doi","").lower().strip() == doi.lower().strip():
-                mc = min(1.0, mc + 0.10)
-            if arxiv_id and c.ids.get("arxiv","") == arxiv_id:
-                mc = min(1.0, mc + 0.10)
-            if (best is None) or mc > best.match_conf:
-                best = type(c)(source=c.source, match_conf=mc, canonical=c.canonical, ids=c.ids)
-
-        if best is None:
-            update_row(rows, key, {
-                "resolve_quality":"10","resolve_confidence":"20",
-                "resolve_remediation":"Unresolved: add DOI or arXiv ID; verify title/authors; replace if non-existent."
-            })
-            cache[key]={"status":"unresolved","candidates":[]}
-            report_lines.append(f"- {key}: unresolved\n")
-            continue
-
-        # compute title and author overlaps against canonical
-        can_title = best.canonical.get("title","")
-        can_auth = best.canonical.get("authors","")
-        can_year = best.canonical.get("year")
-        ts = jaccard(title, can_title)
-        ao = author_overlap(author, can_auth)
-        yd = abs((year or can_year or 0) - (can_year or year or 0)) if (year or can_year) else 99
+        qd = queries[key]
 
-        status = "needs_review"
-        if ts >= pass_t and ao >= pass_a and yd <= pass_y:
-            status = "resolved"
-        elif ts >= review_t and ao >= review_a:
-            status = "needs_review"
-        else:
-            status = "unresolved"
-
-        # quality/confidence mapping
-        if status == "resolved":
-            q = 95
-            c = int(min(100, 70 + best.match_conf*30))
-            rem = "OK: resolved to canonical record; consider updating BibTeX with refs.corrected.bib."
-        elif status == "needs_review":
-            q = 65
-            c = int(min(90, 50 + best.match_conf*40))
-            rem = "Review match: add DOI/arXiv ID and reconcile title/authors/year with canonical metadata."
+        if key in reused:
+            rec = cache[key]
         else:
-            q = 25
-            c = int(min(60, 30 + best.match_conf*30))
-            rem = "Likely mismatch/hallucination: verify existence; add DOI/arXiv; replace with verifiable source."
-
-        # mismatch flags
-        mismatch=[]
-        if year and can_year and int(year)!=int(can_year):
-            mismatch.append(f"year_mismatch(bib={year},can={can_year})")
-        if venue and best.canonical.get("venue") and venue.lower() not in str(best.canonical.get('venue','')).lower():
-            mismatch.append("venue_mismatch")
-
-        cache[key]={
-            "status": status,
-            "match_confidence": best.match_conf,
-            "canonical": best.canonical,
-            "ids": best.ids,
-            "signals": {"title_similarity": ts, "author_overlap": ao, "year_diff": yd},
-            "mismatch": mismatch
-        }
-
-        update_row(rows, key, {
-            "resolve_quality": str(q),
-            "resolve_confidence": str(c),
-            "resolve_remediation": rem
-        })
+            # candidates in fixed backend order so ties break the same way at any --jobs
+            candidates = []
+            for b in BACKENDS:
+                candidates += found.get((key, b), [])
+            rec = _resolve_record(qd, candidates, thr)
+            if outages.get(key):
+                rec["backend_outage"] = sorted(outages[key])
+            if offline:
+                rec["offline"] = True
+            rec["fingerprint"] = fingerprints[key]
+            rec["resolved_at"] = now.isoformat()
+            cache[key] = rec
 
-        report_lines.append(f"- {key}: {status} (title_sim={ts:.2f}, author_overlap={ao:.2f}, year_diff={yd}) {';'.join(mismatch)}\n")
+        rows.update(key, _row_updates(rec))
+        report_lines.append(_report_line(key, rec))
 
         # corrected bib entry if resolved
-        if status == "resolved":
-            # rewrite minimal BibTeX using original type and key; set title/author/year/url/doi
-            can = best.canonical
-            can_doi = best.ids.get("doi","") or fields.get("doi","")
-            can_url = can.get("url","") or fields.get("url","")
-            can_authors = can.get("authors","") or fields.get("author","")
-            can_year_s = str(can.get("year") or fields.get("year",""))
-            can_title_s = can.get("title","") or fields.get("title","")
-            can_venue = can.get("venue","") or venue
-            entry_type = e.entry_type
-            # choose field name for venue
-            venue_field = "journal" if entry_type in ("article",) else "booktitle"
-            bib = [f"@{entry_type}{{{key},"]
-            bib.append(f"  title={{ {can_title_s} }},")
-            if can_authors:
-                bib.append(f"  author={{ {can_authors} }},")
-            if can_year_s:
-                bib.append(f"  year={{ {can_year_s} }},")
-            if can_venue:
-                bib.append(f"  {venue_field}={{ {can_venue} }},")
-            if can_doi:
-                bib.append(f"  doi={{ {can_doi} }},")
-            if can_url:
-                bib.append(f"  url={{ {can_url} }},")
-            bib.append("}\n")
-            corrected_bib.append("\n".join(bib))
-
-    (out_dir/"stage_resolve_report.md").write_text("".join(report_lines), encoding="utf-8")
-    cache_path.write_text(json.dumps(cache, indent=2), encoding="utf-8")
-    (out_dir/"refs.corrected.bib").write_text("\n\n".join(corrected_bib), encoding="utf-8")
-
-    write_rows_atomic(csv_path, rows, cols)
-    print(f"[resolve] updated {len(target_rows)} references; wrote resolution_cache.json, refs.corrected.bib")
+        if rec.get("status") == "resolved":
+            corrected_bib.append(_corrected_bib_entry(key, e.entry_type, qd, rec))
+
+    report_lines.append(f"\nresolved {len(queries) - len(reused)} references; reused {len(reused)} unchanged cached records\n")
+    if local:
+        st = index.stats()
+        report_lines.append(f"\nlocal index: {index.path} ({st['works']} works){' [offline]' if offline else ''}\n")
+    elif offline:
+        report_lines.append("\noffline mode without a local index: no candidates were looked up\n")
+    if cascade is not None:
+        cascade["stats"].save()
+        report_lines += cascade["stats"].report_lines(FUZZY_BACKENDS)
+    outage_keys = [k for k in queries if (cache.get(k) or {}).get("backend_outage") and k not in reused]
+    if outage_keys:
+        report_lines.append(f"\n{len(outage_keys)} references were resolved while a backend was unavailable; they will be re-queried on the next run\n")
+    report_lines += breaker_report_lines()
+    report_lines += http_stats_lines()
+    report_lines += response_cache_stats_lines()
+    ctx.write_text("stage_resolve_report.md", "".join(report_lines))
+    ctx.save_resolution_cache(cache)
+    ctx.write_text("refs.corrected.bib", "\n\n".join(corrected_bib))
+    ctx.end_stage()
+    print(f"[resolve] updated {len(target_rows)} references ({len(reused)} reused from cache); wrote resolution_cache.json, refs.corrected.bib")
     return 0
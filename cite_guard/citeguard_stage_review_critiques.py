@@ -1,8 +1,7 @@
 from __future__ import annotations
 from pathlib import Path
-import csv, json
-from citeguard_csv import load_rows, write_rows_atomic
-from citeguard_yaml import load_yaml
+from typing import Optional
+from citeguard_context import RunContext
 
 STAGES = ["audit","resolve","ground","venue","ml"]
 
@@ -69,14 +68,11 @@ BLOCKER_FUNCS = {
     "sota_claim_with_unresolved_or_low_conf_ref": blocker_sota_claim_with_unresolved_or_low_conf_ref,
 }
 
-def run_review_critiques(tex_path: Path, bib_path: Path, out_dir: Path, args) -> int:
-    cfg={}
-    cfg_path=Path(args.config)
-    if cfg_path.exists():
-        cfg=load_yaml(cfg_path.read_text(encoding="utf-8"))
+def run_review_critiques(tex_path: Path, bib_path: Path, out_dir: Path, args, ctx: Optional[RunContext] = None) -> int:
+    ctx = ctx or RunContext(tex_path, bib_path, out_dir, args)
+    cfg = ctx.config()
 
-    csv_path = out_dir/"audit_references.csv"
-    rows, cols = load_rows(csv_path)
+    rows = ctx.table()
 
     weights = parse_weights(getattr(args,"weights",None)) or (cfg.get("weights") or {st:1.0 for st in STAGES})
     mode = getattr(args,"confidence_weighting",None) or (cfg.get("confidence_weighting") or "linear")
@@ -88,16 +84,11 @@ def run_review_critiques(tex_path: Path, bib_path: Path, out_dir: Path, args) ->
     profile_blockers = [b for b in ((review_cfg.get("profiles") or {}).get(profile, {}) or {}).get("blockers", [])]
 
     # load resolution cache for mismatch + ground signals
-    res_cache_path = out_dir/"resolution_cache.json"
-    res_cache={}
-    if res_cache_path.exists():
-        try:
-            res_cache=json.loads(res_cache_path.read_text(encoding="utf-8"))
-        except Exception:
-            res_cache={}
+    res_cache = ctx.resolution_cache()
 
     # compute scores + priorities
-    for r in rows:
+    for i, r in enumerate(rows):
+        upd = {}
         total_w=0.0
         accum=0.0
         for st in STAGES:
@@ -107,7 +98,7 @@ def run_review_critiques(tex_path: Path, bib_path: Path, out_dir: Path, args) ->
             total_w += w
             accum += w * (q/100.0) * conf_weight(c, mode)
         score = 0.0 if total_w==0 else 100.0*(accum/total_w)
-        r["reference_quality_score"]=f"{score:.1f}"
+        upd["reference_quality_score"]=f"{score:.1f}"
 
         blocker_notes=[]
         # default blockers
@@ -138,8 +129,8 @@ def run_review_critiques(tex_path: Path, bib_path: Path, out_dir: Path, args) ->
                 blocker_notes.append(note)
 
         if blocker_notes:
-            r["review_priority"]="blocker"
-            r["reference_quality_notes"]=" | ".join(blocker_notes)
+            upd["review_priority"]="blocker"
+            upd["reference_quality_notes"]=" | ".join(blocker_notes)
         else:
             # non-blocker priority fallback
             thr = cfg.get("priority_thresholds") or {}
@@ -148,23 +139,20 @@ def run_review_critiques(tex_path: Path, bib_path: Path, out_dir: Path, args) ->
             ground_q = float(r.get("ground_quality","0") or 0)
             venue_q = float(r.get("venue_quality","0") or 0)
             if ground_q < high_ground:
-                r["review_priority"]="high"
-                r["reference_quality_notes"]="Weak grounding support for claims citing this reference."
+                upd["review_priority"]="high"
+                upd["reference_quality_notes"]="Weak grounding support for claims citing this reference."
             elif venue_q < med_venue:
-                r["review_priority"]="medium"
-                r["reference_quality_notes"]="Weak policy/governance fit for its usage."
+                upd["review_priority"]="medium"
+                upd["reference_quality_notes"]="Weak policy/governance fit for its usage."
             else:
-                r["review_priority"]="low"
-                r["reference_quality_notes"]="No blocker triggered; scores acceptable."
+                upd["review_priority"]="low"
+                upd["reference_quality_notes"]="No blocker triggered; scores acceptable."
+        rows.update_at(i, upd)
 
     ranked = sorted(rows, key=lambda x: float(x.get("reference_quality_score","0") or 0))
-    out_csv = out_dir/"review_critiques.csv"
-    with out_csv.open("w", newline="", encoding="utf-8") as f:
-        w = csv.DictWriter(f, fieldnames=cols)
-        w.writeheader()
-        w.writerows(ranked)
+    if ctx.store_backend == "csv":
+        ctx.write_csv("review_critiques.csv", ranked, rows.fieldnames)
 
-    out_md = out_dir/"review_critiques.md"
     lines=[f"# review_critiques (ranked) — profile={profile}\n\n"]
     for i,r in enumerate(ranked[:100], start=1):
         lines.append(f"## {i}. {r['bib_key']} — score {r['reference_quality_score']} — {r['review_priority']}\n")
@@ -172,8 +160,11 @@ def run_review_critiques(tex_path: Path, bib_path: Path, out_dir: Path, args) ->
         for st in STAGES:
             lines.append(f"  - {st}: Q={r.get(st+'_quality')} C={r.get(st+'_confidence')} — {r.get(st+'_remediation')}\n")
         lines.append("\n")
-    out_md.write_text("".join(lines), encoding="utf-8")
+    ctx.write_text("review_critiques.md", "".join(lines))
 
-    write_rows_atomic(csv_path, rows, cols)
-    print(f"[review_critiques] wrote {out_csv}, {out_md}, updated {csv_path} (profile={profile})")
+    ctx.end_stage()
+    if ctx.store_backend == "csv":
+        print(f"[review_critiques] wrote {out_dir/'review_critiques.csv'}, {out_dir/'review_critiques.md'}, updated {ctx.csv_path} (profile={profile})")
+    else:
+        print(f"[review_critiques] wrote {out_dir/'review_critiques.md'}, updated {ctx.store_path}; run `export` for the CSVs (profile={profile})")
     return 0
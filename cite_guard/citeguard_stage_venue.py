@@ -1,9 +1,8 @@
 from __future__ import annotations
 from pathlib import Path
-import json, re
-from citeguard_csv import load_rows, filter_rows, update_row, write_rows_atomic
-from citeguard_yaml import load_yaml
-from citeguard_bib_parse import parse_bib_file
+import re
+from typing import Optional
+from citeguard_context import RunContext
 
 def _genre_from_fields(url: str, entry_type: str, venue: str) -> str:
     u=(url or "").lower()
@@ -20,25 +19,16 @@ def _genre_from_fields(url: str, entry_type: str, venue: str) -> str:
         return "scholarly"
     return "other"
 
-def run_venue(tex_path: Path, bib_path: Path, out_dir: Path, args) -> int:
-    cfg={}
-    cfg_path=Path(args.config)
-    if cfg_path.exists():
-        cfg=load_yaml(cfg_path.read_text(encoding="utf-8"))
+def run_venue(tex_path: Path, bib_path: Path, out_dir: Path, args, ctx: Optional[RunContext] = None) -> int:
+    ctx = ctx or RunContext(tex_path, bib_path, out_dir, args)
+    cfg = ctx.config()
     profile = (args.venue_profile or cfg.get("venue_profile") or "policy_generic").lower()
 
-    csv_path = out_dir/"audit_references.csv"
-    rows, cols = load_rows(csv_path)
-    target_rows = filter_rows(rows, args.only)
+    rows = ctx.table()
+    target_rows = rows.filter(args.only)
 
-    entries = {e.key: e for e in parse_bib_file(bib_path)}
-    res_cache_path = out_dir/"resolution_cache.json"
-    res_cache={}
-    if res_cache_path.exists():
-        try:
-            res_cache=json.loads(res_cache_path.read_text(encoding="utf-8"))
-        except Exception:
-            res_cache={}
+    entries = ctx.bib_entries()
+    res_cache = ctx.resolution_cache()
 
     report=["# venue_report\n\n"]
 
@@ -46,7 +36,7 @@ def run_venue(tex_path: Path, bib_path: Path, out_dir: Path, args) -> int:
         key=r["bib_key"]
         e=entries.get(key)
         if not e:
-            update_row(rows,key,{"venue_quality":"0","venue_confidence":"20","venue_remediation":"Missing bib entry; rerun init or fix --bib."})
+            rows.update(key, {"venue_quality":"0","venue_confidence":"20","venue_remediation":"Missing bib entry; rerun init or fix --bib."})
             continue
         fields={k.lower(): (v or "").strip() for k,v in (e.fields or {}).items()}
         url = fields.get("url","")
@@ -70,11 +60,11 @@ def run_venue(tex_path: Path, bib_path: Path, out_dir: Path, args) -> int:
         if high_priority_fail:
             rem.append("High-priority claim unsupported: strengthen evidence or hedge claim language.")
         remediation=" | ".join(rem) if rem else "OK for policy lens; ensure authority matches claim type."
-        update_row(rows,key,{"venue_quality":str(q),"venue_confidence":str(c),"venue_remediation":remediation})
+        rows.update(key, {"venue_quality":str(q),"venue_confidence":str(c),"venue_remediation":remediation})
         if q<75:
             report.append(f"- {key}: genre={genre} Q={q} C={c} — {remediation}\n")
 
-    (out_dir/"venue_report.md").write_text("".join(report), encoding="utf-8")
-    write_rows_atomic(csv_path, rows, cols)
+    ctx.write_text("venue_report.md", "".join(report))
+    ctx.end_stage()
     print(f"[venue] updated {len(target_rows)} references; wrote venue_report.md (profile={profile})")
     return 0
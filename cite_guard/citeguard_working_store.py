@@ -0,0 +1,120 @@
+from __future__ import annotations
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+import csv, sqlite3, threading
+
+from citeguard_csv import RowStore, load_rows
+
+# SQLite working store (working_store.backend: sqlite). One row per
+# reference in `refs`, one TEXT column per CSV column, with bib_raw kept out
+# of line in `bib_raw` so stages never load or rewrite it. Every row update
+# is its own transaction touching only the columns that changed, so two
+# stages writing different columns at once do not clobber each other, and
+# `--only` runs write just their rows. audit_references.csv and
+# review_critiques.csv are produced by `cite-guard export`.
+
+RAW_COL = "bib_raw"
+
+def _q(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+class SqliteRowStore(RowStore):
+    def __init__(self, db: sqlite3.Connection, path: Path, rows: List[Dict[str,str]], fieldnames: List[str]):
+        super().__init__(rows, fieldnames, dirty=False)
+        self.db = db
+        self.path = path
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def _connect(path: Path) -> sqlite3.Connection:
+        db = sqlite3.connect(str(path), timeout=30, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        return db
+
+    @classmethod
+    def create(cls, path: Path, rows: List[Dict[str,str]], fieldnames: List[str]) -> "SqliteRowStore":
+        """Build a fresh store from rows (init, or a first run over an existing CSV)."""
+        tmp = path.with_name(path.name + ".building")
+        for p in (tmp, Path(str(tmp) + "-wal"), Path(str(tmp) + "-shm")):
+            if p.exists():
+                p.unlink()
+        db = cls._connect(tmp)
+        cols = [c for c in fieldnames if c != RAW_COL]
+        with db:
+            db.execute("CREATE TABLE columns (idx INTEGER PRIMARY KEY, name TEXT NOT NULL)")
+            db.execute(f"CREATE TABLE refs (pos INTEGER PRIMARY KEY, {', '.join(_q(c) + ' TEXT' for c in cols)})")
+            db.execute("CREATE INDEX refs_key ON refs(bib_key)")
+            db.execute("CREATE TABLE bib_raw (pos INTEGER PRIMARY KEY, raw TEXT)")
+            db.executemany("INSERT INTO columns(idx, name) VALUES (?,?)", list(enumerate(fieldnames)))
+            db.executemany(f"INSERT INTO refs(pos, {', '.join(_q(c) for c in cols)}) VALUES ({', '.join('?' * (len(cols) + 1))})",
+                           ([i] + [r.get(c, "") for c in cols] for i, r in enumerate(rows)))
+            db.executemany("INSERT INTO bib_raw(pos, raw) VALUES (?,?)", ((i, r.get(RAW_COL, "")) for i, r in enumerate(rows)))
+        db.close()
+        for p in (Path(str(path) + "-wal"), Path(str(path) + "-shm")):
+            if p.exists():
+                p.unlink()
+        tmp.replace(path)
+        return cls.open(path)
+
+    @classmethod
+    def open(cls, path: Path, csv_path: Optional[Path] = None) -> "SqliteRowStore":
+        """Open the store; if it does not exist yet, import csv_path into it."""
+        if not path.exists():
+            if csv_path is None:
+                raise FileNotFoundError(path)
+            rows, fieldnames = load_rows(csv_path)
+            return cls.create(path, rows, fieldnames)
+        db = cls._connect(path)
+        fieldnames = [n for _, n in db.execute("SELECT idx, name FROM columns ORDER BY idx")]
+        cols = [c for c in fieldnames if c != RAW_COL]
+        rows = [dict(zip(cols, rec)) for rec in db.execute(f"SELECT {', '.join(_q(c) for c in cols)} FROM refs ORDER BY pos")]
+        return cls(db, path, rows, fieldnames)
+
+    def update_at(self, i: int, updates: Dict[str,str]) -> None:
+        r = self.rows[i]
+        changed = {k: str(v) for k, v in updates.items() if r.get(k) != str(v)}
+        if not changed:
+            return
+        raw = changed.pop(RAW_COL, None)
+        with self.lock, self.db:
+            if changed:
+                self.db.execute(f"UPDATE refs SET {', '.join(_q(k) + '=?' for k in changed)} WHERE pos=?", [*changed.values(), i])
+            if raw is not None:
+                self.db.execute("UPDATE bib_raw SET raw=? WHERE pos=?", (raw, i))
+        r.update(changed)
+
+    def ensure_columns(self, names: List[str], after: Optional[str] = None) -> None:
+        missing = [n for n in names if n not in self.fieldnames]
+        if not missing:
+            return
+        super().ensure_columns(names, after)
+        with self.lock, self.db:
+            for n in missing:
+                self.db.execute(f"ALTER TABLE refs ADD COLUMN {_q(n)} TEXT DEFAULT ''")
+            self.db.execute("DELETE FROM columns")
+            self.db.executemany("INSERT INTO columns(idx, name) VALUES (?,?)", list(enumerate(self.fieldnames)))
+        self.dirty = False
+
+    def write(self, csv_path: Path) -> None:
+        """Row updates are committed as they happen; CSVs come from export_csv()."""
+        self.dirty = False
+
+    def _export_rows(self, order: List[int]) -> Iterator[Dict[str,str]]:
+        with self.lock:
+            raw = dict(self.db.execute("SELECT pos, raw FROM bib_raw"))
+        for i in order:
+            yield {**self.rows[i], RAW_COL: raw.get(i, "")}
+
+    def export_csv(self, csv_path: Path, ranked: bool = False) -> int:
+        """Write the store as CSV (ranked: ascending reference_quality_score, as review_critiques.csv)."""
+        order = list(range(len(self.rows)))
+        if ranked:
+            order.sort(key=lambda i: float(self.rows[i].get("reference_quality_score", "0") or 0))
+        tmp = csv_path.with_suffix(".tmp")
+        with tmp.open("w", newline="", encoding="utf-8") as f:
+            w = csv.DictWriter(f, fieldnames=self.fieldnames)
+            w.writeheader()
+            w.writerows(self._export_rows(order))
+        tmp.replace(csv_path)
+        return len(order)
@@ -16,6 +16,7 @@ def load_yaml(text: str) -> Dict[str, Any]:
     lines = [ln for ln in lines if ln.strip() != ""]
     root: Dict[str, Any] = {}
     stack: List[tuple[int, Any]] = [(0, root)]
+    pending: Dict[int, str] = {}  # id(empty dict) -> its key in the parent
     for ln in lines:
         indent = len(ln) - len(ln.lstrip(" "))
         s = ln.strip()
@@ -25,6 +26,12 @@ def load_yaml(text: str) -> Dict[str, Any]:
         container = stack[-1][1]
         if s.startswith("- "):
             item = s[2:].strip().strip('"').strip("'")
+            if isinstance(container, dict) and not container and len(stack) > 1:
+                # "key:" followed by "- item" lines: the placeholder dict is really a list
+                container = []
+                ind, parent_key = stack[-1][0], pending[id(stack[-1][1])]
+                stack[-2][1][parent_key] = container
+                stack[-1] = (ind, container)
             if not isinstance(container, list):
                 raise ValueError("List item without list container")
             container.append(_parse_scalar(item))
@@ -39,6 +46,7 @@ def load_yaml(text: str) -> Dict[str, Any]:
             new = {}
             # if next line is list item at greater indent, convert to list later when encountered
             container[k]=new
+            pending[id(new)] = k
             stack.append((indent+2, new))
         else:
             if v.startswith("[") and v.endswith("]"):
@@ -19,11 +19,15 @@ def build_parser() -> argparse.ArgumentParser:
             "  --out ./out\n"
             "  --ml-profile neurips\n\n"
             "Run order (typical):\n"
-            "  init -> audit -> resolve -> ground --fetch -> venue -> ml -> review_critiques\n\n"
+            "  init -> audit -> resolve -> ground --fetch -> venue -> ml -> review_critiques\n"
+            "  (or all of them in one process: all)\n\n"
             "Examples:\n"
             "  python3 cite-guard/scripts/citeguard_cli.py init\n"
             "  python3 cite-guard/scripts/citeguard_cli.py resolve --only \"(vaswani|lewis)\"\n"
+            "  python3 cite-guard/scripts/citeguard_cli.py resolve --jobs 8\n"
             "  python3 cite-guard/scripts/citeguard_cli.py ground --fetch\n"
+            "  python3 cite-guard/scripts/citeguard_cli.py --fetch all --checkpoint\n"
+            "  python3 cite-guard/scripts/citeguard_cli.py index build --dblp-xml dblp.xml.gz\n"
             "  python3 cite-guard/scripts/citeguard_cli.py review_critiques --rules-profile neurips\n"
             "  python3 cite-guard/scripts/citeguard_cli.py review_critiques --weights audit=1,resolve=2,ground=2,venue=1,ml=1\n"
         ),
@@ -40,6 +44,13 @@ def build_parser() -> argparse.ArgumentParser:
     p.add_argument("--fetch", action="store_true", help="Enable evidence fetching in ground stage (overrides config)")
     p.add_argument("--no-fetch", action="store_true", help="Disable evidence fetching in ground stage (overrides config)")
     p.add_argument("--weights", default=None, help="Override stage weights e.g. audit=1,resolve=2,ground=2,venue=1,ml=1")
+    p.add_argument("--jobs", type=int, default=None, help="Concurrent network workers for resolve and ground --fetch (overrides config)")
+    p.add_argument("--force", action="store_true", help="Resolve: ignore cached records and re-query every reference")
+    p.add_argument("--max-age", type=float, default=None, help="Resolve: re-query cached records older than N days (overrides config)")
+    p.add_argument("--cascade", action="store_true", help="Resolve: adaptive backend cascade with early exit (overrides config)")
+    p.add_argument("--extract-workers", type=int, default=None, help="Ground: parse PDFs in N worker processes (overrides config; default 1 = lazy in-process)")
+    p.add_argument("--offline", action="store_true", help="Resolve: use only the local metadata index, no network backends")
+    p.add_argument("--store", choices=["csv","sqlite"], default=None, help="Working results store (overrides config working_store.backend)")
     p.add_argument("--confidence-weighting", default=None, help="equal|linear|quadratic (overrides config)")
 
     sp = p.add_subparsers(dest="stage", required=True)
@@ -50,6 +61,14 @@ def build_parser() -> argparse.ArgumentParser:
     sp.add_parser("venue", help="Populate venue_* columns per reference (policy lens).")
     sp.add_parser("ml", help="Populate ml_* columns per reference (ML lens; default NeurIPS).")
     sp.add_parser("review_critiques", help="Compute reference_quality_score and produce ranked critique outputs.")
+    ap = sp.add_parser("all", help="Run the config's `stages` (default: init..review_critiques) in one process with shared state.")
+    ap.add_argument("--checkpoint", action="store_true", help="Write outputs after every stage instead of once at the end")
+    sp.add_parser("export", help="Write audit_references.csv and review_critiques.csv from the SQLite working store.")
+    ip = sp.add_parser("index", help="Build the offline metadata index used by resolve (local backend).")
+    ip.add_argument("action", choices=["build"], help="build: ingest metadata dumps into the index")
+    ip.add_argument("--dblp-xml", default=None, help="DBLP XML dump (dblp.xml or dblp.xml.gz)")
+    ip.add_argument("--openalex-jsonl", default=None, help="OpenAlex works snapshot, one JSON work per line (.gz ok)")
+    ip.add_argument("--index-path", default=None, help="Index file (default: local_index.path from config, else the user cache dir)")
     return p
 
 def main() -> int:
@@ -85,6 +104,15 @@ def main() -> int:
     if args.stage == "review_critiques":
         from citeguard_stage_review_critiques import run_review_critiques
         return run_review_critiques(tex_path, bib_path, out_dir, args)
+    if args.stage == "all":
+        from citeguard_stage_all import run_all
+        return run_all(tex_path, bib_path, out_dir, args)
+    if args.stage == "export":
+        from citeguard_stage_export import run_export
+        return run_export(tex_path, bib_path, out_dir, args)
+    if args.stage == "index":
+        from citeguard_stage_index import run_index
+        return run_index(tex_path, bib_path, out_dir, args)
 
     raise RuntimeError(f"Unknown stage: {args.stage}")
 